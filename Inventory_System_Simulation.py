@@ -1,135 +1,287 @@
+import io
+import time
+from itertools import islice
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
-def random_digit_assignment(probabilities):
-    cumulative_prob = np.cumsum(probabilities)
-    ranges = []
-    start = 1
-    
-    for i, prob in enumerate(cumulative_prob):
-        if i == len(cumulative_prob) - 1:
-            # For the last range, always end at 100
-            end = 100
-        else:
-            # For all other ranges, round up to the nearest whole number
-            end = int(np.ceil(prob * 100))
-        
-        ranges.append(f"{start}-{end}")
-        start = end + 1
-    
-    return ranges
+# The simulation core lives in inventory_core; the original helpers stay importable from here too
+from inventory_core import (
+    EXPORT_FORMATS,
+    DigitDistribution,
+    IncrementalSimulator,
+    ManualDigitSource,
+    SimulationProfiler,
+    determine_value_from_random_digit,
+    place_new_order,
+    process_incoming_orders,
+    random_digit_assignment,
+    seeded_digit_sources,
+    simulate_inventory_columns,
+    simulate_inventory_system,
+)
+from inventory_jobs import JobRunner, ResultStore
+
+# Streamlit caches are shared by every session on the server; bound them so a busy deployment
+# keeps the popular scenarios warm without growing without limit.
+CACHE_MAX_ENTRIES = 128
+CACHE_TTL_SECONDS = 60 * 60
+# Export files grow with the horizon (a million weeks is tens of MB per format), so only short runs are
+# cached, in a much smaller cache; longer runs are written only when "Prepare Export" is clicked, and a
+# session keeps just its latest one
+EXPORT_CACHE_MAX_ENTRIES = 8
+EXPORT_CACHE_MAX_WEEKS = 100_000
+
+# Long runs are summarized and charted in full but shown PAGE_SIZE weeks at a time
+MAX_WEEKS = 1_000_000
+PAGE_SIZE = 100
+CHART_POINTS = 2000
+
+# Runs of at least BACKGROUND_MIN_WEEKS go to a worker pool shared by all sessions, so they never block a
+# script run; the page polls every JOB_POLL_SECONDS and shows the weeks finished so far. A job left unpolled
+# for JOB_ABANDON_SECONDS (its page was closed) stops itself. Finished long runs are kept server-wide, the
+# FINISHED_RUNS most recent for CACHE_TTL_SECONDS, rather than in each session.
+BACKGROUND_MIN_WEEKS = 50_000
+JOB_WORKERS = 2
+JOB_CHUNK_WEEKS = 10_000
+JOB_POLL_SECONDS = 0.5
+JOB_ABANDON_SECONDS = 30
+FINISHED_RUNS = 4
+
+# Random-number resolution for the probability-to-digit mapping; None is the textbook two-digit scheme
+DIGIT_RESOLUTIONS = {
+    "Two-digit 01-00 (textbook)": None,
+    "1 in 10,000": 10 ** 4,
+    "1 in 1,000,000": 10 ** 6,
+}
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_distribution(values, probabilities, resolution=None):
+    return DigitDistribution.from_probabilities(values, probabilities, resolution)
+
+def _digit_sources(digits_key):
+    # digits_key is ('manual', demand_digits, lead_time_digits) or ('seeded', seed, resolution)
+    if digits_key[0] == 'manual':
+        return ManualDigitSource(digits_key[1]), ManualDigitSource(digits_key[2])
+    return seeded_digit_sources(digits_key[1], demand_resolution=digits_key[2], lead_time_resolution=digits_key[2])
+
+def _session_simulator():
+    # One per browser session, so a cache miss after a small edit resumes from that session's last run
+    if 'incremental_simulator' not in st.session_state:
+        st.session_state['incremental_simulator'] = IncrementalSimulator()
+    return st.session_state['incremental_simulator']
+
+@st.cache_resource
+def _simulation_results():
+    # Results of foreground runs shared by every session, keyed by simulation_args
+    return ResultStore(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+
+def _simulation_result(simulation_args, profiler=None):
+    # Shared results first; a miss runs on this session's own IncrementalSimulator, outside any shared
+    # cache, so what it resumes from only ever depends on this session's runs. On a hit profiler
+    # records nothing.
+    result = _simulation_results().get(simulation_args)
+    if result is not None:
+        return result
+    (initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+     demand_key, lead_time_key, digits_key, num_weeks, allow_multiple_orders) = simulation_args
+    demand_source, lead_time_source = _digit_sources(digits_key)
+    # At most num_weeks digits of either kind can be used
+    result = _session_simulator().run(
+        initial_inventory=initial_inventory,
+        order_point=order_point,
+        max_inventory=max_inventory,
+        shortage_cost_per_thousand=shortage_cost_per_thousand,
+        order_cost_per_order=order_cost_per_order,
+        demand_distribution=_cached_distribution(*demand_key),
+        lead_time_distribution=_cached_distribution(*lead_time_key),
+        demand_random_digits=list(islice(demand_source, num_weeks)),
+        lead_time_random_digits=list(islice(lead_time_source, num_weeks)),
+        num_weeks=num_weeks,
+        allow_multiple_orders=allow_multiple_orders,
+        profiler=profiler
+    )
+    _simulation_results().put(simulation_args, result)
+    return result
+
+def _export_bytes(result, file_format, profiler=None):
+    # Written in chunks rather than via one big to_csv
+    profiler = profiler or SimulationProfiler()
+    with profiler.phase('export'):
+        buffer = io.BytesIO()
+        result.write(buffer, file_format)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=EXPORT_CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_export(simulation_args, file_format, _result, _profiler=None):
+    # Export bytes keyed like _simulation_result (_result is the run for simulation_args)
+    return _export_bytes(_result, file_format, _profiler)
+
+@st.cache_resource
+def _job_runner():
+    # One bounded pool for the whole server
+    return JobRunner(max_workers=JOB_WORKERS, abandon_after=JOB_ABANDON_SECONDS)
+
+@st.cache_resource
+def _finished_runs():
+    # Results of background runs, keyed by simulation_args
+    return ResultStore(max_entries=FINISHED_RUNS, ttl_seconds=CACHE_TTL_SECONDS)
+
+def _submit_simulation_job(simulation_args, profiler=None):
+    (initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+     demand_key, lead_time_key, digits_key, num_weeks, allow_multiple_orders) = simulation_args
+    demand_source, lead_time_source = _digit_sources(digits_key)
+    return _job_runner().submit_simulation(
+        chunk_size=JOB_CHUNK_WEEKS,
+        profiler=profiler,
+        initial_inventory=initial_inventory,
+        order_point=order_point,
+        max_inventory=max_inventory,
+        shortage_cost_per_thousand=shortage_cost_per_thousand,
+        order_cost_per_order=order_cost_per_order,
+        demand_distribution=_cached_distribution(*demand_key),
+        lead_time_distribution=_cached_distribution(*lead_time_key),
+        demand_random_digits=demand_source,
+        lead_time_random_digits=lead_time_source,
+        num_weeks=num_weeks,
+        allow_multiple_orders=allow_multiple_orders
+    )
 
-def determine_value_from_random_digit(random_digit, distribution):
-    for value, info in distribution.items():
-        if info['start'] <= random_digit <= info['end']:
-            return value
-    return None
+def show_timings(profiler, total_seconds):
+    # Compute phases come from the engine; rendering phases are timed in main(). Sub-phases are shown
+    # under their parent and left out of the subtotals, which would otherwise count them twice.
+    compute_phases = ['simulation', 'summary', 'export']
+    sub_phases = {'digit_lookup': 'simulation', 'order_processing': 'simulation'}
+    phases = profiler.to_dict()['phases']
+    rows = []
+    subtotals = {'Compute': 0.0, 'Rendering': 0.0}
+    for name, timing in phases.items():
+        parent = sub_phases.get(name)
+        kind = 'Compute' if (parent or name) in compute_phases else 'Rendering'
+        if parent is None:
+            subtotals[kind] += timing['seconds']
+        label = name if parent is None else f"{parent} / {name}"
+        rows.append({'Phase': label, 'Kind': kind, 'Seconds': timing['seconds'], 'Calls': timing['calls']})
+    rows.sort(key=lambda row: (row['Kind'], row['Phase']))
+    rows += [{'Phase': f"{kind.lower()} total", 'Kind': kind, 'Seconds': seconds, 'Calls': 1} for kind, seconds in subtotals.items()]
+    rows.append({'Phase': 'total', 'Kind': '', 'Seconds': total_seconds, 'Calls': 1})
+    with st.expander("Timings"):
+        if 'simulation' not in phases:
+            st.caption("Results came from the cache; the simulation itself was not re-run.")
+        st.dataframe(pd.DataFrame(rows))
+        if profiler.counters:
+            st.json(dict(profiler.counters))
+        st.download_button("Download Timings (JSON)", profiler.to_json(indent=2), 'timings.json', 'application/json')
+        st.download_button("Download Timings (Prometheus)", profiler.to_prometheus(), 'timings.prom', 'text/plain')
+
+def highlight_total(df_results):
+    # Styles the whole frame at once instead of calling back into Python for every row
+    is_total = df_results['Week'].eq('Total').to_numpy()[:, None]
+    styles = np.where(is_total, 'background-color: Black', '')
+    return pd.DataFrame(np.broadcast_to(styles, df_results.shape), index=df_results.index, columns=df_results.columns)
+
+def show_results(result, simulation_args, profiler=None, elapsed_seconds=0.0, exportable=True):
+    # profiler is None unless timings were asked for; elapsed_seconds is the time spent getting result
+    show_timings_panel = profiler is not None
+    profiler = profiler or SimulationProfiler()
+    started = time.perf_counter()
+
+    st.subheader("Simulation Results")
+    with profiler.phase('summary'):
+        summary = result.summary()
+    cost_columns = st.columns(3)
+    cost_columns[0].metric("Total Cost (Rs)", summary['total_cost'])
+    cost_columns[1].metric("Shortage Cost (Rs)", summary['total_shortage_cost'])
+    cost_columns[2].metric("Ordering Cost (Rs)", summary['total_ordering_cost'])
+    service_columns = st.columns(3)
+    service_columns[0].metric("Fill Rate", f"{summary['fill_rate']:.1%}")
+    service_columns[1].metric("Mean Ending Inventory", f"{summary['mean_inventory'] * 1000:,.0f}")
+    service_columns[2].metric("Stockout Weeks", f"{summary['stockout_weeks']:,} of {summary['weeks']:,}")
+
+    with profiler.phase('chart'):
+        st.line_chart(result.inventory_profile(CHART_POINTS), x='Week')
+    if len(result) > CHART_POINTS:
+        st.caption(f"Each point summarizes {-(-len(result) // CHART_POINTS)} weeks (mean, min and max ending inventory).")
+
+    num_pages = max(1, -(-len(result) // PAGE_SIZE))
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(f"Page (of {num_pages:,})", min_value=1, max_value=num_pages, step=1, key='results_page')
+    start = (page - 1) * PAGE_SIZE
+    with profiler.phase('display_table'):
+        df_page = result.to_display_frame(start, start + PAGE_SIZE, include_total=page == num_pages)
+    with profiler.phase('styling'):
+        styled_df = df_page.style.apply(highlight_total, axis=None)
+    with profiler.phase('render'):
+        st.dataframe(styled_df)
 
-def process_incoming_orders(outstanding_orders):
-    arriving_quantity = 0
-    updated_orders = []
-    
-    for qty, weeks_left in outstanding_orders:
-        if weeks_left == 0:
-            arriving_quantity += qty
-        else:
-            updated_orders.append((qty, weeks_left - 1))
-                
-    return arriving_quantity, updated_orders
-
-def place_new_order(ending_inventory, outstanding_orders, lead_time_index, lead_time_random_digits, lead_time_distribution, order_point, max_inventory):
-    if ending_inventory <= order_point and not outstanding_orders:
-        quantity_ordered = max_inventory - ending_inventory
-        if lead_time_index < len(lead_time_random_digits):
-            lead_time_digit = lead_time_random_digits[lead_time_index]
-            lead_time = determine_value_from_random_digit(lead_time_digit, lead_time_distribution)
-            lead_time_index += 1
-            return quantity_ordered, lead_time, lead_time_digit, lead_time_index
-    return None, None, None, lead_time_index
-
-def simulate_inventory_system(
-    initial_inventory,
-    order_point,
-    max_inventory,
-    shortage_cost_per_thousand,
-    order_cost_per_order,
-    demand_distribution,
-    lead_time_distribution,
-    demand_random_digits,
-    lead_time_random_digits,
-    num_weeks
-):
-    inventory = initial_inventory
-    outstanding_orders = []
-    results = []
-    lead_time_index = 0
-    total_ordering_cost = 0
-    total_shortage_cost = 0
-    
-    for week in range(1, num_weeks + 1):
-        arriving_qty, outstanding_orders = process_incoming_orders(outstanding_orders)
-        beginning_inventory = inventory + arriving_qty
-        
-        if week-1 < len(demand_random_digits):
-            demand_digit = demand_random_digits[week-1]
-            demand = determine_value_from_random_digit(demand_digit, demand_distribution)
+    if exportable:
+        export_format = st.selectbox("Export Format", list(EXPORT_FORMATS))
+        if len(result) <= EXPORT_CACHE_MAX_WEEKS:
+            export_data = _cached_export(simulation_args, export_format, result, _profiler=profiler)
         else:
-            demand_digit = None
-            demand = 0
-        
-        if beginning_inventory >= demand:
-            ending_inventory = beginning_inventory - demand
-            shortage = 0
+            export_key = (simulation_args, export_format)
+            prepared = st.session_state.get('prepared_export')
+            export_data = prepared[1] if prepared is not None and prepared[0] == export_key else None
+            if export_data is None and st.button("Prepare Export"):
+                st.session_state.pop('prepared_export', None)
+                export_data = _export_bytes(result, export_format, profiler)
+                st.session_state['prepared_export'] = (export_key, export_data)
+        if export_data is not None:
+            st.download_button(
+                label="Download Results",
+                data=export_data,
+                file_name=f'simulation_results.{export_format}',
+                mime=EXPORT_FORMATS[export_format],
+            )
+
+    if show_timings_panel:
+        show_timings(profiler, elapsed_seconds + time.perf_counter() - started)
+
+def show_job(job, simulation_args, profile_run):
+    job.poll()
+    status = job.status
+    if status in ('queued', 'running'):
+        if status == 'queued':
+            st.info("Waiting for a free worker; simulations from other sessions are ahead in the queue.")
         else:
-            ending_inventory = 0
-            shortage = demand - beginning_inventory
-        
-        quantity_ordered, lead_time, lead_time_digit, lead_time_index = place_new_order(
-            ending_inventory, outstanding_orders, lead_time_index, lead_time_random_digits, lead_time_distribution, order_point, max_inventory
-        )
-        
-        ordering_cost = 0
-        if quantity_ordered:
-            outstanding_orders.append((quantity_ordered, lead_time))
-            ordering_cost = order_cost_per_order
-            total_ordering_cost += ordering_cost
-        
-        shortage_cost = shortage * shortage_cost_per_thousand
-        total_shortage_cost += shortage_cost
-        
-        results.append({
-            'Week': week,
-            'Beginning Inventory': beginning_inventory * 1000,
-            'Demand Digit': demand_digit if demand_digit else '-',
-            'Demand (K)': int(demand) * 1000,
-            'Ending Inventory': ending_inventory * 1000,
-            'Shortage (k)': shortage if shortage else 0,
-            'Shortage Cost (Rs)': shortage_cost if shortage_cost else 0,
-            'Lead Time Digit': lead_time_digit if lead_time_digit else '-',
-            'Lead Time (weeks)': lead_time if lead_time else '-',
-            'Quantity Ordered': quantity_ordered * 1000 if quantity_ordered else '-'
-        
-            
-           
-        })
-        
-        inventory = ending_inventory
-    
-    results.append({
-        'Week': 'Total',
-        'Beginning Inventory': '-',
-        'Demand Digit': '-',
-        'Demand (K)': '-',
-        'Ending Inventory': '-',
-        'Shortage (k)': '-',
-        'Shortage Cost (Rs)': total_shortage_cost,
-        'Lead Time Digit': '-',
-        'Lead Time (weeks)': '-',
-        'Quantity Ordered': '-',
-    })
-    
-    return results
+            st.progress(job.progress, text=f"Simulated {job.completed:,} of {job.total:,} weeks")
+        if st.button("Cancel Simulation"):
+            job.cancel()
+        partial = job.partial_result()
+        if partial is not None:
+            show_results(partial, simulation_args, exportable=False)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    elif status == 'cancelled':
+        st.warning(f"Simulation cancelled after {job.completed:,} of {job.total:,} weeks.")
+        partial = job.partial_result()
+        if partial is not None:
+            show_results(partial, simulation_args, exportable=False)
+    elif status == 'failed':
+        st.exception(job.future.exception())
+    else:
+        # The session lets go of the job; later reruns find the result in _finished_runs()
+        result = job.result()
+        _finished_runs().put(simulation_args, result)
+        st.session_state.pop('simulation_job', None)
+        profiler = None
+        if profile_run:
+            profiler = SimulationProfiler()
+            if job.profiler is not None:
+                profiler.merge(job.profiler)
+        show_results(result, simulation_args, profiler, job.elapsed_seconds)
+
+def _start_run(simulation_args):
+    # Run button callback: it runs once per click, before the script, so the st.rerun() polling of a job
+    # can never submit the run again
+    st.session_state['simulation_args'] = simulation_args
+    st.session_state.pop('results_page', None)
+    st.session_state.pop('prepared_export', None)
+    previous_job = st.session_state.pop('simulation_job', None)
+    if previous_job is not None:
+        previous_job.cancel()
 
 def main():
     st.title("Inventory Management Simulation")
@@ -146,6 +298,16 @@ def main():
     max_inventory = st.sidebar.number_input("Max Inventory Level (in thousands)", min_value=1, value=4, step=1)
     shortage_cost_per_thousand = st.sidebar.number_input("Shortage Cost per Thousand (Rs)", min_value=0, value=10, step=1)
     order_cost_per_order = st.sidebar.number_input("Ordering Cost per Order (Rs)", min_value=0, value=50, step=1)
+    allow_multiple_orders = st.sidebar.checkbox(
+        "Allow Multiple Outstanding Orders",
+        value=False,
+        help="Reorder on inventory position (on hand + on order) instead of waiting for the open order to arrive."
+    )
+    digit_resolution = DIGIT_RESOLUTIONS[st.sidebar.selectbox(
+        "Digit Resolution",
+        list(DIGIT_RESOLUTIONS),
+        help="Finer random numbers follow the probabilities to 1/resolution instead of rounding them to whole percents."
+    )]
 
     # Demand Distribution
     st.sidebar.subheader("Demand Distribution")
@@ -154,15 +316,11 @@ def main():
         for i in range(4)
     ]
     demand_probs = [prob / sum(demand_probs) for prob in demand_probs]  # Normalize probabilities
-    demand_ranges = random_digit_assignment(demand_probs)
-    
-    demand_distribution = {
-        i: {'probability': prob, 'start': int(range.split('-')[0]), 'end': int(range.split('-')[1])}
-        for i, (prob, range) in enumerate(zip(demand_probs, demand_ranges))
-    }
+    demand_key = (tuple(range(4)), tuple(demand_probs), digit_resolution)
+    demand_distribution = _cached_distribution(*demand_key)
 
     st.sidebar.markdown("**Demand Categories:**")
-    for key, val in demand_distribution.items():
+    for key, val in demand_distribution.to_dict().items():
         st.sidebar.text(f"Demand {key} (k): {val['start']}-{val['end']} (Prob: {val['probability']:.2f})")
 
     # Lead Time Distribution
@@ -172,74 +330,83 @@ def main():
         for i in range(2, 5)
     ]
     lead_time_probs = [prob / sum(lead_time_probs) for prob in lead_time_probs]  # Normalize probabilities
-    lead_time_ranges = random_digit_assignment(lead_time_probs)
-    
-    lead_time_distribution = {
-        i: {'probability': prob, 'start': int(range.split('-')[0]), 'end': int(range.split('-')[1])}
-        for i, (prob, range) in zip(range(2, 5), zip(lead_time_probs, lead_time_ranges))
-    }
+    lead_time_key = (tuple(range(2, 5)), tuple(lead_time_probs), digit_resolution)
+    lead_time_distribution = _cached_distribution(*lead_time_key)
 
     st.sidebar.markdown("**Lead Time Categories:**")
-    for key, val in lead_time_distribution.items():
+    for key, val in lead_time_distribution.to_dict().items():
         st.sidebar.text(f"Lead Time {key} weeks: {val['start']}-{val['end']} (Prob: {val['probability']:.2f})")
 
     # Random Digits Input
     st.header("Random Digits for Simulation")
+    digit_source = st.radio("Random Digit Source", ["Manual list", "Seeded generator"], horizontal=True)
+
+    if digit_source == "Manual list":
+        if digit_resolution is not None:
+            st.caption(f"Digits run from 1 to {digit_resolution:,} at this resolution.")
+        st.subheader("Demand Random Digits")
+        default_demand_random_digits = "31,70,53,86,32,78,26,64,45,12,99,52,43,84,38,40,19,87,83,73"
+        demand_random_digits_input = st.text_area(
+            "Enter Demand Random Digits (comma-separated, e.g., 31,70,53,...):",
+            value=default_demand_random_digits
+        )
+        demand_random_digits = tuple(
+            int(x.strip()) for x in demand_random_digits_input.split(",") if x.strip().isdigit()
+        )
 
-    st.subheader("Demand Random Digits")
-    default_demand_random_digits = "31,70,53,86,32,78,26,64,45,12,99,52,43,84,38,40,19,87,83,73"
-    demand_random_digits_input = st.text_area(
-        "Enter Demand Random Digits (comma-separated, e.g., 31,70,53,...):",
-        value=default_demand_random_digits
-    )
-    demand_random_digits = [int(x.strip()) for x in demand_random_digits_input.split(",") if x.strip().isdigit()]
-
-    st.subheader("Lead Time Random Digits")
-    default_lead_time_random_digits = "29,83,58,41,13"
-    lead_time_random_digits_input = st.text_area(
-        "Enter Lead Time Random Digits (comma-separated, e.g., 29,83,58,...):",
-        value=default_lead_time_random_digits
-    )
-    lead_time_random_digits = [int(x.strip()) for x in lead_time_random_digits_input.split(",") if x.strip().isdigit()]
+        st.subheader("Lead Time Random Digits")
+        default_lead_time_random_digits = "29,83,58,41,13"
+        lead_time_random_digits_input = st.text_area(
+            "Enter Lead Time Random Digits (comma-separated, e.g., 29,83,58,...):",
+            value=default_lead_time_random_digits
+        )
+        lead_time_random_digits = tuple(
+            int(x.strip()) for x in lead_time_random_digits_input.split(",") if x.strip().isdigit()
+        )
+        digits_key = ('manual', demand_random_digits, lead_time_random_digits)
+    else:
+        seed = st.number_input("Random Seed", min_value=0, value=12345, step=1)
+        digits_key = ('seeded', int(seed), demand_distribution.resolution)
 
     # Simulation Control
     st.header("Run Simulation")
-    num_weeks = st.number_input("Number of Weeks to Simulate", min_value=1, max_value=20, value=20, step=1)
-
-    if st.button("Run Simulation"):
-        results = simulate_inventory_system(
-            initial_inventory=initial_inventory,
-            order_point=order_point,
-            max_inventory=max_inventory,
-            shortage_cost_per_thousand=shortage_cost_per_thousand,
-            order_cost_per_order=order_cost_per_order,
-            demand_distribution=demand_distribution,
-            lead_time_distribution=lead_time_distribution,
-            demand_random_digits=demand_random_digits,
-            lead_time_random_digits=lead_time_random_digits,
-            num_weeks=num_weeks
-        )
-
-        df_results = pd.DataFrame(results)
-
-        def highlight_total(row):
-            if row['Week'] == 'Total':
-                return ['background-color: Black'] * len(row)
-            else:
-                return [''] * len(row)
-
-        styled_df = df_results.style.apply(highlight_total, axis=1)
-
-        st.subheader("Simulation Results")
-        st.dataframe(styled_df)
-
-        csv = df_results.to_csv(index=False)
-        st.download_button(
-            label="Download Results as CSV",
-            data=csv,
-            file_name='simulation_results.csv',
-            mime='text/csv',
-        )
+    num_weeks = st.number_input("Number of Weeks to Simulate", min_value=1, max_value=MAX_WEEKS, value=20, step=1)
+    profile_run = st.checkbox("Show Timings", value=False)
+
+    simulation_args = (
+        initial_inventory,
+        order_point,
+        max_inventory,
+        shortage_cost_per_thousand,
+        order_cost_per_order,
+        demand_key,
+        lead_time_key,
+        digits_key,
+        num_weeks,
+        allow_multiple_orders
+    )
+    # Kept in the session so paging through the table or switching export format keeps the results
+    st.button("Run Simulation", on_click=_start_run, args=(simulation_args,))
+
+    simulation_args = st.session_state.get('simulation_args')
+    if simulation_args is None:
+        return
+    profiler = SimulationProfiler() if profile_run else None
+    run_weeks = simulation_args[8]
+    if 'simulation_job' not in st.session_state and run_weeks >= BACKGROUND_MIN_WEEKS:
+        result = _finished_runs().get(simulation_args)
+        if result is not None:
+            show_results(result, simulation_args, profiler)
+            return
+        # Not run yet, or pushed out of the finished runs since
+        st.session_state['simulation_job'] = _submit_simulation_job(simulation_args, profiler)
+
+    if 'simulation_job' in st.session_state:
+        show_job(st.session_state['simulation_job'], simulation_args, profile_run)
+    else:
+        started = time.perf_counter()
+        result = _simulation_result(simulation_args, profiler)
+        show_results(result, simulation_args, profiler, time.perf_counter() - started)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,243 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_core import (
+    EXPORT_FORMATS,
+    DigitDistribution,
+    InventoryRunningStats,
+    determine_value_from_random_digit,
+    iterate_inventory_chunks,
+    place_new_order,
+    process_incoming_orders,
+    random_digit_assignment,
+    seeded_digit_sources,
+    simulate_inventory_batch,
+    simulate_inventory_columns,
+    simulate_inventory_system,
+    simulate_multi_item,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+DEMAND_DISTRIBUTION = DigitDistribution.from_probabilities(range(4), [0.2, 0.4, 0.3, 0.1])
+LEAD_TIME_DISTRIBUTION = DigitDistribution.from_probabilities(range(2, 5), [0.3, 0.4, 0.3])
+POLICY = dict(
+    initial_inventory=3,
+    order_point=2,
+    max_inventory=4,
+    shortage_cost_per_thousand=10,
+    order_cost_per_order=50,
+    demand_distribution=DEMAND_DISTRIBUTION,
+    lead_time_distribution=LEAD_TIME_DISTRIBUTION,
+)
+
+def uniform_distribution(num_categories, resolution=None):
+    return DigitDistribution.from_probabilities(
+        range(num_categories), [1 / num_categories] * num_categories, resolution
+    )
+
+def scalar_case(num_weeks):
+    demand_source, lead_time_source = seeded_digit_sources(0)
+    return lambda: simulate_inventory_system(
+        **POLICY,
+        demand_random_digits=demand_source.draw(num_weeks).tolist(),
+        lead_time_random_digits=lead_time_source.draw(num_weeks).tolist(),
+        num_weeks=num_weeks
+    )
+
+def columns_case(num_weeks):
+    demand_source, lead_time_source = seeded_digit_sources(0)
+    return lambda: simulate_inventory_columns(
+        **POLICY,
+        demand_random_digits=demand_source,
+        lead_time_random_digits=lead_time_source,
+        num_weeks=num_weeks
+    )
+
+def streaming_case(num_weeks):
+    def run():
+        demand_source, lead_time_source = seeded_digit_sources(0)
+        stats = InventoryRunningStats()
+        for chunk in iterate_inventory_chunks(
+            **POLICY,
+            demand_random_digits=demand_source,
+            lead_time_random_digits=lead_time_source,
+            num_weeks=num_weeks
+        ):
+            stats.update_chunk(chunk)
+        return stats.summary()
+    return run
+
+def export_case(num_weeks, file_format):
+    demand_source, lead_time_source = seeded_digit_sources(0)
+    result = simulate_inventory_columns(
+        **POLICY,
+        demand_random_digits=demand_source,
+        lead_time_random_digits=lead_time_source,
+        num_weeks=num_weeks
+    )
+    return lambda: result.write(io.BytesIO(), file_format)
+
+def batch_case(num_replications, num_weeks):
+    demand_source, lead_time_source = seeded_digit_sources(0)
+    demand_random_digits = demand_source.draw((num_replications, num_weeks))
+    lead_time_random_digits = lead_time_source.draw((num_replications, num_weeks))
+    return lambda: simulate_inventory_batch(
+        **POLICY,
+        demand_random_digits=demand_random_digits,
+        lead_time_random_digits=lead_time_random_digits,
+        num_weeks=num_weeks
+    )
+
+def multi_item_case(num_skus, num_locations, num_weeks):
+    return lambda: simulate_multi_item(
+        3, 2, 4, 10, 50,
+        [DEMAND_DISTRIBUTION] * num_skus,
+        [LEAD_TIME_DISTRIBUTION] * num_skus,
+        num_locations,
+        num_weeks,
+        seed=0
+    )
+
+def dict_lookup_case(num_categories, num_draws=100_000):
+    distribution = uniform_distribution(num_categories).to_dict()
+    digits = seeded_digit_sources(0)[0].draw(num_draws).tolist()
+    return lambda: [determine_value_from_random_digit(digit, distribution) for digit in digits]
+
+def table_lookup_case(num_categories, num_draws=100_000, resolution=None):
+    distribution = uniform_distribution(num_categories, resolution)
+    digits = seeded_digit_sources(0, demand_resolution=distribution.resolution)[0].draw(num_draws)
+    return lambda: distribution.lookup(digits)
+
+def uniform_lookup_case(num_categories, resolution, num_draws=100_000):
+    distribution = uniform_distribution(num_categories, resolution)
+    uniforms = np.random.default_rng(0).random(num_draws)
+    return lambda: distribution.lookup_uniform(uniforms)
+
+def helpers_case(num_calls=100_000):
+    distribution = LEAD_TIME_DISTRIBUTION.to_dict()
+    probabilities = [0.2, 0.4, 0.3, 0.1]
+    def run():
+        for _ in range(num_calls):
+            process_incoming_orders([(2, 1), (3, 0)])
+            place_new_order(1, [], 0, [29], distribution, 2, 4)
+            random_digit_assignment(probabilities)
+    return run
+
+def build_cases(quick):
+    # name -> zero-argument factory; a case's inputs (digits, simulated results) are only prepared when
+    # it is actually run, so --filter skips the setup of everything else
+    horizons = [20, 10_000] if quick else [20, 10_000, 1_000_000]
+    cases = {}
+    for num_weeks in horizons:
+        cases[f'scalar/weeks={num_weeks}'] = partial(scalar_case, num_weeks)
+        cases[f'columns/weeks={num_weeks}'] = partial(columns_case, num_weeks)
+        cases[f'streaming/weeks={num_weeks}'] = partial(streaming_case, num_weeks)
+        if num_weeks > 20:
+            for file_format in EXPORT_FORMATS:
+                cases[f'export/format={file_format}/weeks={num_weeks}'] = partial(export_case, num_weeks, file_format)
+    batch_sizes = [(100, 20), (10_000, 20), (10_000, 52), (100, 10_000)]
+    if not quick:
+        batch_sizes.append((10, 1_000_000))
+    for num_replications, num_weeks in batch_sizes:
+        cases[f'batch/replications={num_replications}/weeks={num_weeks}'] = partial(
+            batch_case, num_replications, num_weeks
+        )
+    cases['multi_item/skus=1000/locations=5/weeks=52'] = partial(multi_item_case, 1000, 5, 52)
+    for num_categories in [4, 25, 100]:
+        cases[f'lookup_dict/categories={num_categories}'] = partial(dict_lookup_case, num_categories)
+        cases[f'lookup_table/categories={num_categories}'] = partial(table_lookup_case, num_categories)
+        cases[f'lookup_table/categories={num_categories}/resolution=1000000'] = partial(
+            table_lookup_case, num_categories, resolution=10 ** 6
+        )
+        cases[f'lookup_uniform/categories={num_categories}/resolution=1000000'] = partial(
+            uniform_lookup_case, num_categories, 10 ** 6
+        )
+    cases['helpers/calls=100000'] = helpers_case
+    return cases
+
+def measure(run, repeat, track_memory):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    result = {'seconds': min(timings)}
+    if track_memory:
+        # Separate pass: tracemalloc slows Python-heavy code too much to time under it
+        tracemalloc.start()
+        run()
+        result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_memory_mb'):
+            if metric in current and metric in previous and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]:.4g} -> {current[metric]:.4g}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inventory simulation engines.")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write this run's results.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Stored results to compare against.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown/growth before flagging.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the fastest is kept.")
+    parser.add_argument('--quick', action='store_true', help="Skip the 1M-week cases.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the peak-memory pass.")
+    parser.add_argument('--filter', default='', help="Only run cases whose name contains this text.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, make_case in build_cases(args.quick).items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(make_case(), args.repeat, not args.no_memory)
+        memory = results[name].get('peak_memory_mb')
+        memory_text = f"{memory:10.2f} MB" if memory is not None else ""
+        print(f"{name:50s} {results[name]['seconds']:10.4f} s {memory_text}")
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from inventory_core import (
+    DigitDistribution,
+    ManualDigitSource,
+    seeded_digit_sources,
+    simulate_inventory_batch,
+)
+
+# Textbook scenario; every scenario field falls back to these
+SCENARIO_DEFAULTS = {
+    'initial_inventory': 3,
+    'order_point': 2,
+    'max_inventory': 4,
+    'shortage_cost_per_thousand': 10,
+    'order_cost_per_order': 50,
+    'demand_values': [0, 1, 2, 3],
+    'demand_probabilities': [0.2, 0.4, 0.3, 0.1],
+    'lead_time_values': [2, 3, 4],
+    'lead_time_probabilities': [0.3, 0.4, 0.3],
+    'num_weeks': 20,
+    'num_replications': 1,
+    'seed': None,
+    'demand_digits': None,
+    'lead_time_digits': None,
+    'allow_multiple_orders': False,
+    'digit_resolution': None,
+}
+
+LIST_FIELDS = ['demand_values', 'demand_probabilities', 'lead_time_values', 'lead_time_probabilities',
+               'demand_digits', 'lead_time_digits']
+INT_FIELDS = [
+    'initial_inventory', 'order_point', 'max_inventory', 'num_weeks', 'num_replications', 'seed', 'digit_resolution',
+]
+FLOAT_FIELDS = ['shortage_cost_per_thousand', 'order_cost_per_order']
+
+SUMMARY_COLUMNS = [
+    'name', 'num_replications', 'num_weeks', 'mean_total_cost', 'std_total_cost', 'mean_shortage_cost',
+    'mean_ordering_cost', 'mean_inventory', 'fill_rate', 'orders_per_week',
+]
+
+# Finest digit_resolution a scenario may ask for; boundaries are rounded in floating point, which stays
+# exact to well past this
+MAX_DIGIT_RESOLUTION = 10**9
+
+def _parse_csv_field(name, value):
+    # CSV cells hold lists as "0.2;0.4;0.3;0.1" (spaces work too); empty cells mean "use the default"
+    if value is None or value.strip() == '':
+        return None
+    if name in LIST_FIELDS:
+        return [float(x) if '.' in x else int(x) for x in value.replace(';', ' ').split()]
+    if name in INT_FIELDS:
+        return int(value)
+    if name in FLOAT_FIELDS:
+        return float(value)
+    if name == 'allow_multiple_orders':
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return value
+
+def load_scenarios(path):
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        scenarios = []
+        for row in rows:
+            parsed = {name: _parse_csv_field(name, value) for name, value in row.items()}
+            scenarios.append({name: value for name, value in parsed.items() if value is not None})
+    else:
+        with open(path) as f:
+            scenarios = json.load(f)
+        if isinstance(scenarios, dict):
+            scenarios = scenarios['scenarios']
+
+    for i, scenario in enumerate(scenarios):
+        unknown = set(scenario) - set(SCENARIO_DEFAULTS) - {'name'}
+        if unknown:
+            raise ValueError(f"Scenario {i + 1} has unknown fields: {', '.join(sorted(unknown))}")
+        resolution = scenario.get('digit_resolution')
+        if resolution is not None and (
+            isinstance(resolution, bool) or not isinstance(resolution, int)
+            or not 1 <= resolution <= MAX_DIGIT_RESOLUTION
+        ):
+            raise ValueError(
+                f"Scenario {i + 1} has digit_resolution {resolution!r}; "
+                f"it must be a whole number from 1 to {MAX_DIGIT_RESOLUTION}"
+            )
+        scenario.setdefault('name', f"scenario_{i + 1}")
+    return scenarios
+
+def run_scenario(scenario):
+    settings = {**SCENARIO_DEFAULTS, **scenario}
+    num_weeks = settings['num_weeks']
+    num_replications = settings['num_replications']
+    # No digit_resolution keeps the textbook two-digit ranges; e.g. 1000000 samples at 1-in-a-million steps
+    demand_distribution = DigitDistribution.from_probabilities(
+        settings['demand_values'], settings['demand_probabilities'], settings['digit_resolution']
+    )
+    lead_time_distribution = DigitDistribution.from_probabilities(
+        settings['lead_time_values'], settings['lead_time_probabilities'], settings['digit_resolution']
+    )
+
+    # A given digit list is shared by every replication; a missing one comes from the seed, with its own
+    # substream per replication, so giving only demand digits still draws lead times
+    demand_source, lead_time_source = seeded_digit_sources(
+        settings['seed'],
+        demand_resolution=demand_distribution.resolution,
+        lead_time_resolution=lead_time_distribution.resolution
+    )
+    if settings['demand_digits'] is not None:
+        demand_source = ManualDigitSource(settings['demand_digits'])
+    if settings['lead_time_digits'] is not None:
+        lead_time_source = ManualDigitSource(settings['lead_time_digits'])
+
+    batch = simulate_inventory_batch(
+        initial_inventory=settings['initial_inventory'],
+        order_point=settings['order_point'],
+        max_inventory=settings['max_inventory'],
+        shortage_cost_per_thousand=settings['shortage_cost_per_thousand'],
+        order_cost_per_order=settings['order_cost_per_order'],
+        demand_distribution=demand_distribution,
+        lead_time_distribution=lead_time_distribution,
+        demand_random_digits=demand_source.replication_block(0, num_replications, num_weeks),
+        lead_time_random_digits=lead_time_source.replication_block(0, num_replications, num_weeks),
+        num_weeks=num_weeks,
+        allow_multiple_orders=settings['allow_multiple_orders']
+    )
+
+    total_demand = batch['demand'].sum()
+    return {
+        'name': settings['name'],
+        'num_replications': num_replications,
+        'num_weeks': num_weeks,
+        'mean_total_cost': float(batch['total_cost'].mean()),
+        'std_total_cost': float(batch['total_cost'].std(ddof=1)) if num_replications > 1 else 0.0,
+        'mean_shortage_cost': float(batch['total_shortage_cost'].mean()),
+        'mean_ordering_cost': float(batch['total_ordering_cost'].mean()),
+        'mean_inventory': float(batch['ending_inventory'].mean()) if num_weeks else 0.0,
+        'fill_rate': float(1 - batch['shortage'].sum() / total_demand) if total_demand else 1.0,
+        'orders_per_week': float(batch['order_placed'].mean()) if num_weeks else 0.0,
+    }
+
+def run_scenarios(scenarios, max_workers=None):
+    if max_workers == 1 or len(scenarios) <= 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+    workers = max_workers or os.cpu_count() or 1
+    # Short jobs: hand each worker several scenarios per round trip
+    chunksize = max(1, len(scenarios) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_scenario, scenarios, chunksize=chunksize))
+
+def write_summaries(summaries, path):
+    if path == '-':
+        json.dump(summaries, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(summaries)
+    else:
+        with open(path, 'w') as f:
+            json.dump(summaries, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of inventory scenarios without the Streamlit app.")
+    parser.add_argument('scenarios', help="JSON list of scenario objects, or a CSV with one scenario per row.")
+    parser.add_argument('-o', '--output', default='-', help="Summary file (.csv or .json); '-' prints JSON.")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Worker processes (default: all cores).")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios)
+    summaries = run_scenarios(scenarios, args.workers)
+    write_summaries(summaries, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1813 @@
+# Simulation core: NumPy only. pandas is imported lazily by the few functions that build DataFrames,
+# so batch workers and the CLI can import this module without paying for the UI stack.
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from statistics import NormalDist
+import csv
+import gzip
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+class SimulationProfiler:
+    # Optional instrumentation: per-phase wall-clock timers and event counters. Engines take
+    # profiler=None by default and skip all bookkeeping then, so the disabled cost is one check.
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds, calls=1):
+        self.seconds[name] += seconds
+        self.calls[name] += calls
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def merge(self, other):
+        # Folds in another profiler's totals, e.g. one filled in by a worker thread
+        for name, seconds in other.seconds.items():
+            self.add_time(name, seconds, other.calls[name])
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def to_dict(self):
+        return {
+            'phases': {name: {'seconds': self.seconds[name], 'calls': self.calls[name]} for name in self.seconds},
+            'counters': dict(self.counters),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='inventory_simulation'):
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total Wall-clock time spent in each phase.",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{name}"}} {seconds!r}' for name, seconds in self.seconds.items()]
+        lines += [
+            f"# HELP {prefix}_phase_calls_total Number of timed entries into each phase.",
+            f"# TYPE {prefix}_phase_calls_total counter",
+        ]
+        lines += [f'{prefix}_phase_calls_total{{phase="{name}"}} {calls}' for name, calls in self.calls.items()]
+        for name, value in self.counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+def random_digit_assignment(probabilities):
+    cumulative_prob = np.cumsum(probabilities)
+    ranges = []
+    start = 1
+    
+    for i, prob in enumerate(cumulative_prob):
+        if i == len(cumulative_prob) - 1:
+            # For the last range, always end at 100
+            end = 100
+        else:
+            # For all other ranges, round up to the nearest whole number
+            end = int(np.ceil(prob * 100))
+        
+        ranges.append(f"{start}-{end}")
+        start = end + 1
+    
+    return ranges
+
+# Largest resolution that also gets a dense (resolution + 1)-entry lookup table; finer distributions map
+# random numbers by binary search over their ranges, so memory follows the number of ranges instead
+DENSE_TABLE_MAX_RESOLUTION = 10**4
+
+class DigitDistribution:
+    # Compiled digit-range distribution. The ranges become sorted, non-overlapping segments covering
+    # 0-resolution, so a random number maps to its category by a binary search over segment starts; up to
+    # DENSE_TABLE_MAX_RESOLUTION a (resolution + 1)-entry table maps it with one array index instead.
+    def __init__(self, values, starts, ends, probabilities=None, resolution=100):
+        self.values = np.asarray(list(values))
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.resolution = resolution
+        if probabilities is None:
+            probabilities = np.clip(self.ends - self.starts + 1, 0, None) / resolution
+        self.probabilities = np.asarray(probabilities, dtype=float)
+
+        # Segments start at every range start and after every range end; earlier ranges win where ranges
+        # overlap, like the linear scan over a distribution dict, and -1 marks numbers no range covers
+        clipped_starts = np.clip(self.starts, 0, resolution + 1)
+        clipped_ends = np.clip(self.ends, -1, resolution)
+        bounds = np.unique(np.concatenate(([0, resolution + 1], clipped_starts, clipped_ends + 1)))
+        first_segments = np.searchsorted(bounds, clipped_starts)
+        stop_segments = np.searchsorted(bounds, clipped_ends + 1)
+        indices = np.full(len(bounds) - 1, -1, dtype=np.int64)
+        for i in range(len(self.values) - 1, -1, -1):
+            indices[first_segments[i]:stop_segments[i]] = i
+        keep = np.concatenate(([True], indices[1:] != indices[:-1]))
+        self.segment_starts = bounds[:-1][keep]
+        self.segment_indices = indices[keep]
+
+        self.index_table = None
+        self._index_list = None
+        if resolution <= DENSE_TABLE_MAX_RESOLUTION:
+            self.index_table = np.repeat(self.segment_indices, np.diff(self.segment_bounds()))
+            self._index_list = self.index_table.tolist()
+        # Plain-list copies for the scalar per-draw path, where NumPy scalar indexing is the slow part
+        self._segment_start_list = self.segment_starts.tolist()
+        self._segment_index_list = self.segment_indices.tolist()
+        self._value_list = self.values.tolist()
+
+    @classmethod
+    def from_probabilities(cls, values, probabilities, resolution=None):
+        # resolution=None is the classic two-digit mode: the same ranges as random_digit_assignment, whose
+        # rounding up can shift a boundary by a whole 1%. Otherwise draws are 1-resolution (e.g. 10**6)
+        # and every boundary is rounded to the nearest step, so each probability is off by at most
+        # 1 / resolution; one below half a step gets an empty range.
+        cumulative = np.cumsum(probabilities)
+        if resolution is None:
+            resolution = 100
+            ends = np.ceil(cumulative * resolution).astype(np.int64)
+        else:
+            ends = np.rint(cumulative * resolution).astype(np.int64)
+        ends[-1] = resolution
+        starts = np.concatenate(([1], ends[:-1] + 1))
+        return cls(values, starts, ends, probabilities, resolution)
+
+    @classmethod
+    def from_dict(cls, distribution, resolution=None):
+        # Dicts don't record their resolution; the top range end gives it (two-digit tables end at 100)
+        if resolution is None:
+            resolution = max([100] + [int(info['end']) for info in distribution.values()])
+        return cls(
+            distribution.keys(),
+            [info['start'] for info in distribution.values()],
+            [info['end'] for info in distribution.values()],
+            [
+                info.get('probability', (info['end'] - info['start'] + 1) / resolution)
+                for info in distribution.values()
+            ],
+            resolution,
+        )
+
+    def to_dict(self):
+        return {
+            value: {'probability': float(prob), 'start': int(start), 'end': int(end)}
+            for value, prob, start, end in zip(self.values.tolist(), self.probabilities, self.starts, self.ends)
+        }
+
+    def value_for(self, random_digit):
+        if 0 <= random_digit <= self.resolution:
+            if self._index_list is not None:
+                index = self._index_list[random_digit]
+            else:
+                index = self._segment_index_list[bisect_right(self._segment_start_list, random_digit) - 1]
+            if index >= 0:
+                return self._value_list[index]
+        return None
+
+    def segment_bounds(self):
+        # Segment k covers the random numbers segment_bounds()[k] to segment_bounds()[k + 1] - 1
+        return np.append(self.segment_starts, self.resolution + 1)
+
+    def category_indices(self, random_digits):
+        # Index into values for each random number (0-resolution), -1 where no range covers it
+        if self.index_table is not None:
+            return self.index_table[random_digits]
+        return self.segment_indices[np.searchsorted(self.segment_starts, random_digits, side='right') - 1]
+
+    def lookup(self, random_digits):
+        random_digits = np.asarray(random_digits, dtype=np.int64)
+        if random_digits.size and (random_digits.min() < 0 or random_digits.max() > self.resolution):
+            raise ValueError(f"Random digits must be between 0 and {self.resolution}")
+        indices = self.category_indices(random_digits)
+        if random_digits.size and indices.min() < 0:
+            raise ValueError("Random digits must fall inside the distribution's digit ranges")
+        return self.values[indices]
+
+    def digits_for_uniform(self, uniforms):
+        # Uniform floats in [0, 1) as this distribution's random numbers (1-resolution)
+        return np.floor(np.asarray(uniforms, dtype=float) * self.resolution).astype(np.int64) + 1
+
+    def lookup_uniform(self, uniforms):
+        return self.lookup(self.digits_for_uniform(uniforms))
+
+def compile_distribution(distribution):
+    if isinstance(distribution, DigitDistribution):
+        return distribution
+    return DigitDistribution.from_dict(distribution)
+
+def determine_value_from_random_digit(random_digit, distribution):
+    if isinstance(distribution, DigitDistribution):
+        return distribution.value_for(random_digit)
+    for value, info in distribution.items():
+        if info['start'] <= random_digit <= info['end']:
+            return value
+    return None
+
+class ManualDigitSource:
+    # Hand-typed digits, used once each in order. Running out keeps the classic fallbacks
+    # (no demand, no further orders), and every replication or worker sees the same list.
+    def __init__(self, digits):
+        self.digits = list(digits)
+
+    def __iter__(self):
+        return iter(self.digits)
+
+    def substream(self, index):
+        return self
+
+    def replication_block(self, first_replication, num_replications, length):
+        digits = np.asarray(self.digits[:length], dtype=np.int64)
+        return np.broadcast_to(digits, (num_replications, len(digits)))
+
+class RandomDigitSource:
+    # Endless random numbers 1-resolution (two-digit 1-100 by default, where 100 stands for "00") from
+    # a seeded numpy.random.Generator, drawn in bulk blocks. Iterating again replays the same digits.
+    def __init__(self, seed=None, block_size=4096, resolution=100):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.block_size = block_size
+        self.resolution = resolution
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed_sequence)
+        while True:
+            yield from rng.integers(1, self.resolution + 1, size=self.block_size).tolist()
+
+    def substream(self, index, resolution=None):
+        # Independent child stream; built from the spawn key so it does not depend on call order
+        child = np.random.SeedSequence(
+            self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key + (index,)
+        )
+        return RandomDigitSource(child, self.block_size, resolution or self.resolution)
+
+    def generator(self):
+        return np.random.default_rng(self.seed_sequence)
+
+    def draw(self, size):
+        return self.generator().integers(1, self.resolution + 1, size=size)
+
+    def replication_block(self, first_replication, num_replications, length):
+        # Replication r always gets substream r, however replications are split across workers
+        block = np.empty((num_replications, length), dtype=np.int64)
+        for i in range(num_replications):
+            block[i] = self.substream(first_replication + i).draw(length)
+        return block
+
+def seeded_digit_sources(seed=None, block_size=4096, demand_resolution=100, lead_time_resolution=100):
+    # Independent demand and lead time streams from one seed; each resolution should match the
+    # distribution its digits are looked up in
+    root = RandomDigitSource(seed, block_size)
+    return root.substream(0, demand_resolution), root.substream(1, lead_time_resolution)
+
+def process_incoming_orders(outstanding_orders):
+    arriving_quantity = 0
+    updated_orders = []
+    
+    for qty, weeks_left in outstanding_orders:
+        if weeks_left == 0:
+            arriving_quantity += qty
+        else:
+            updated_orders.append((qty, weeks_left - 1))
+                
+    return arriving_quantity, updated_orders
+
+def place_new_order(ending_inventory, outstanding_orders, lead_time_index, lead_time_random_digits, lead_time_distribution, order_point, max_inventory):
+    if ending_inventory <= order_point and not outstanding_orders:
+        quantity_ordered = max_inventory - ending_inventory
+        if lead_time_index < len(lead_time_random_digits):
+            lead_time_digit = lead_time_random_digits[lead_time_index]
+            lead_time = determine_value_from_random_digit(lead_time_digit, lead_time_distribution)
+            lead_time_index += 1
+            return quantity_ordered, lead_time, lead_time_digit, lead_time_index
+    return None, None, None, lead_time_index
+
+class OrderPipeline:
+    # Outstanding orders bucketed by arrival week in a ring buffer indexed by week mod its size, so
+    # collecting a week's arrivals is O(1) however many orders are in flight. An order placed in week t
+    # with lead time L arrives at the start of week t + L + 1, as with process_incoming_orders.
+    def __init__(self, max_lead_time):
+        self.size = max_lead_time + 1
+        self.quantities = [0] * self.size
+        self.order_counts = [0] * self.size
+        self.on_order = 0
+        self.num_orders = 0
+
+    def receive(self, week):
+        slot = week % self.size
+        quantity = self.quantities[slot]
+        self.on_order -= quantity
+        self.num_orders -= self.order_counts[slot]
+        self.quantities[slot] = 0
+        self.order_counts[slot] = 0
+        return quantity
+
+    def place(self, week, quantity, lead_time):
+        if not 0 <= lead_time < self.size:
+            raise ValueError(f"Lead time {lead_time} is outside the pipeline's range 0-{self.size - 1}")
+        slot = (week + lead_time + 1) % self.size
+        self.quantities[slot] += quantity
+        self.order_counts[slot] += 1
+        self.on_order += quantity
+        self.num_orders += 1
+
+    def copy(self):
+        pipeline = OrderPipeline.__new__(OrderPipeline)
+        pipeline.size = self.size
+        pipeline.quantities = list(self.quantities)
+        pipeline.order_counts = list(self.order_counts)
+        pipeline.on_order = self.on_order
+        pipeline.num_orders = self.num_orders
+        return pipeline
+
+class SimulationState:
+    # Everything the engine carries from one week to the next. week is the last completed week (one
+    # demand digit used per week); lead_time_index counts the lead time digits used so far.
+    def __init__(self, inventory, pipeline, week=0, lead_time_index=0, total_shortage_cost=0, total_ordering_cost=0):
+        self.inventory = inventory
+        self.pipeline = pipeline
+        self.week = week
+        self.lead_time_index = lead_time_index
+        self.total_shortage_cost = total_shortage_cost
+        self.total_ordering_cost = total_ordering_cost
+
+    def snapshot(self):
+        return SimulationState(
+            self.inventory, self.pipeline.copy(), self.week, self.lead_time_index,
+            self.total_shortage_cost, self.total_ordering_cost,
+        )
+
+WeekRecord = namedtuple('WeekRecord', [
+    'week', 'beginning_inventory', 'demand_digit', 'demand', 'ending_inventory', 'shortage',
+    'shortage_cost', 'lead_time_digit', 'lead_time', 'quantity_ordered', 'ordering_cost',
+])
+
+def iterate_inventory_system(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    demand_random_digits,
+    lead_time_random_digits,
+    num_weeks=None,
+    allow_multiple_orders=False,
+    state=None,
+    profiler=None
+):
+    # Yields one WeekRecord per week and keeps nothing else, so memory stays constant over any horizon.
+    # The digits may be any iterables (including endless ones); num_weeks=None runs until the caller stops.
+    # With allow_multiple_orders, orders may overlap and the reorder rule uses the inventory position
+    # (on hand plus on order) instead of waiting for the outstanding order to arrive.
+    # Passing a SimulationState resumes after state.week (num_weeks stays the absolute last week, and the
+    # digits must start at the first unused ones); the state is brought up to date before every yield.
+    # A SimulationProfiler collects time spent on digit lookups and order processing: the loop calls those
+    # steps through local names, which are swapped for timed wrappers only when profiling.
+    demand_distribution = compile_distribution(demand_distribution)
+    lead_time_distribution = compile_distribution(lead_time_distribution)
+    demand_random_digits = iter(demand_random_digits)
+    lead_time_random_digits = iter(lead_time_random_digits)
+    if state is None:
+        state = SimulationState(initial_inventory, OrderPipeline(int(lead_time_distribution.values.max())))
+    inventory = state.inventory
+    pipeline = state.pipeline
+    week = first_week = state.week
+
+    demand_for = demand_distribution.value_for
+    lead_time_for = lead_time_distribution.value_for
+    receive_orders = pipeline.receive
+    place_order = pipeline.place
+    if profiler is not None:
+        demand_for, lead_time_for, receive_orders, place_order = timers = [
+            _TimedCall(demand_for), _TimedCall(lead_time_for), _TimedCall(receive_orders), _TimedCall(place_order)
+        ]
+
+    try:
+        while num_weeks is None or week < num_weeks:
+            week += 1
+            beginning_inventory = inventory + receive_orders(week)
+
+            demand_digit = next(demand_random_digits, None)
+            if demand_digit is not None:
+                demand = demand_for(demand_digit)
+            else:
+                demand = 0
+
+            if beginning_inventory >= demand:
+                ending_inventory = beginning_inventory - demand
+                shortage = 0
+            else:
+                ending_inventory = 0
+                shortage = demand - beginning_inventory
+
+            quantity_ordered = lead_time = lead_time_digit = None
+            if allow_multiple_orders:
+                inventory_position = ending_inventory + pipeline.on_order
+                wants_order = inventory_position <= order_point
+            else:
+                inventory_position = ending_inventory
+                wants_order = ending_inventory <= order_point and not pipeline.num_orders
+            if wants_order:
+                lead_time_digit = next(lead_time_random_digits, None)
+                if lead_time_digit is not None:
+                    state.lead_time_index += 1
+                    quantity_ordered = max_inventory - inventory_position
+                    lead_time = lead_time_for(lead_time_digit)
+
+            ordering_cost = 0
+            if quantity_ordered:
+                place_order(week, quantity_ordered, lead_time)
+                ordering_cost = order_cost_per_order
+
+            shortage_cost = shortage * shortage_cost_per_thousand
+            inventory = ending_inventory
+            state.inventory = inventory
+            state.week = week
+            state.total_shortage_cost += shortage_cost
+            state.total_ordering_cost += ordering_cost
+
+            yield WeekRecord(
+                week, beginning_inventory, demand_digit, demand, ending_inventory, shortage,
+                shortage_cost, lead_time_digit, lead_time, quantity_ordered, ordering_cost,
+            )
+    finally:
+        if profiler is not None:
+            demand_timer, lead_time_timer, receive_timer, place_timer = timers
+            profiler.add_time(
+                'digit_lookup', demand_timer.seconds + lead_time_timer.seconds, demand_timer.calls + lead_time_timer.calls
+            )
+            profiler.add_time(
+                'order_processing', receive_timer.seconds + place_timer.seconds, receive_timer.calls + place_timer.calls
+            )
+            profiler.count('weeks', state.week - first_week)
+            profiler.count('lookups', demand_timer.calls + lead_time_timer.calls)
+            profiler.count('orders_placed', place_timer.calls)
+
+class _TimedCall:
+    # Stands in for a function inside the profiled week loop, keeping its own running time and call count
+    # so the loop needs no timing code of its own
+    def __init__(self, function):
+        self.function = function
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, *args):
+        started = time.perf_counter()
+        try:
+            return self.function(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.calls += 1
+
+def iterate_inventory_chunks(*args, chunk_size=65536, **kwargs):
+    # Same run as iterate_inventory_system, packed into fixed-size chunks of NumPy arrays (quantities in
+    # thousands; 0 where no order was placed, which order_placed marks). Only one chunk is alive at a time.
+    records = iterate_inventory_system(*args, **kwargs)
+    profiler = kwargs.get('profiler')
+    while True:
+        chunk = {name: np.zeros(chunk_size, dtype=np.int64) for name in _CHUNK_INT_COLUMNS}
+        chunk['shortage_cost'] = np.zeros(chunk_size)
+        chunk['ordering_cost'] = np.zeros(chunk_size)
+        chunk['order_placed'] = np.zeros(chunk_size, dtype=bool)
+        size = 0
+        for record in records:
+            chunk['week'][size] = record.week
+            chunk['beginning_inventory'][size] = record.beginning_inventory
+            chunk['demand'][size] = record.demand
+            chunk['ending_inventory'][size] = record.ending_inventory
+            chunk['shortage'][size] = record.shortage
+            chunk['shortage_cost'][size] = record.shortage_cost
+            # Orders are told apart by quantity, not cost: ordering can be free
+            if record.quantity_ordered:
+                chunk['quantity_ordered'][size] = record.quantity_ordered
+                chunk['lead_time'][size] = record.lead_time
+                chunk['ordering_cost'][size] = record.ordering_cost
+                chunk['order_placed'][size] = True
+            size += 1
+            if size == chunk_size:
+                break
+        if size == 0:
+            return
+        if profiler is not None:
+            profiler.count('stockout_weeks', int(np.count_nonzero(chunk['shortage'][:size])))
+        yield {name: column[:size] for name, column in chunk.items()}
+        if size < chunk_size:
+            return
+
+_CHUNK_INT_COLUMNS = [
+    'week', 'beginning_inventory', 'demand', 'ending_inventory', 'shortage', 'quantity_ordered', 'lead_time',
+]
+
+class InventoryRunningStats:
+    # Running aggregates over a week stream; feed it WeekRecords or chunks from iterate_inventory_chunks.
+    def __init__(self):
+        self.weeks = 0
+        self.total_ending_inventory = 0
+        self.total_demand = 0
+        self.total_shortage = 0
+        self.orders_placed = 0
+        self.total_shortage_cost = 0
+        self.total_ordering_cost = 0
+
+    def update(self, record):
+        self.weeks += 1
+        self.total_ending_inventory += record.ending_inventory
+        self.total_demand += record.demand
+        self.total_shortage += record.shortage
+        self.orders_placed += bool(record.quantity_ordered)
+        self.total_shortage_cost += record.shortage_cost
+        self.total_ordering_cost += record.ordering_cost
+
+    def update_chunk(self, chunk):
+        self.weeks += len(chunk['week'])
+        self.total_ending_inventory += int(chunk['ending_inventory'].sum())
+        self.total_demand += int(chunk['demand'].sum())
+        self.total_shortage += int(chunk['shortage'].sum())
+        self.orders_placed += int(np.count_nonzero(chunk['order_placed']))
+        self.total_shortage_cost += float(chunk['shortage_cost'].sum())
+        self.total_ordering_cost += float(chunk['ordering_cost'].sum())
+
+    @property
+    def mean_inventory(self):
+        return self.total_ending_inventory / self.weeks if self.weeks else 0.0
+
+    @property
+    def fill_rate(self):
+        return 1 - self.total_shortage / self.total_demand if self.total_demand else 1.0
+
+    @property
+    def cost_per_week(self):
+        return (self.total_shortage_cost + self.total_ordering_cost) / self.weeks if self.weeks else 0.0
+
+    def summary(self):
+        return {
+            'weeks': self.weeks,
+            'mean_inventory': self.mean_inventory,
+            'fill_rate': self.fill_rate,
+            'orders_placed': self.orders_placed,
+            'shortage_cost_per_week': self.total_shortage_cost / self.weeks if self.weeks else 0.0,
+            'ordering_cost_per_week': self.total_ordering_cost / self.weeks if self.weeks else 0.0,
+            'cost_per_week': self.cost_per_week,
+        }
+
+_MASKED_COLUMNS = ['demand_digit', 'lead_time_digit', 'lead_time', 'quantity_ordered']
+
+_DISPLAY_COLUMNS = [
+    'Week', 'Beginning Inventory', 'Demand Digit', 'Demand (K)', 'Ending Inventory', 'Shortage (k)',
+    'Shortage Cost (Rs)', 'Lead Time Digit', 'Lead Time (weeks)', 'Quantity Ordered',
+]
+
+# Export format -> MIME type
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+@contextmanager
+def _binary_output(file):
+    # Paths are opened (and closed) here; file objects are written to and left open for the caller
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'wb') as f:
+            yield f
+    else:
+        yield file
+
+class SimulationResult:
+    # Columnar week-by-week result. Every column is a typed NumPy array (quantities in thousands); the
+    # optional columns carry a mask (True = no digit / no order) instead of '-' strings, and the totals
+    # live in their own dict rather than in a fake 'Total' row.
+    def __init__(self, columns, masks, totals):
+        self.columns = columns
+        self.masks = masks
+        self.totals = totals
+
+    def __len__(self):
+        return len(self.columns['week'])
+
+    def head(self, num_rows):
+        return SimulationResult(
+            {name: values[:num_rows] for name, values in self.columns.items()},
+            {name: mask[:num_rows] for name, mask in self.masks.items()},
+            _column_totals_of(self.columns, num_rows),
+        )
+
+    @staticmethod
+    def concatenate(*results):
+        first = results[0]
+        columns = {name: np.concatenate([result.columns[name] for result in results]) for name in first.columns}
+        masks = {name: np.concatenate([result.masks[name] for result in results]) for name in first.masks}
+        return SimulationResult(columns, masks, _column_totals_of(columns))
+
+    def to_frame(self):
+        import pandas as pd
+
+        # Zero-copy: plain columns are wrapped as-is, masked ones become nullable Int64 over the same buffers
+        data = {}
+        for name, values in self.columns.items():
+            if name in self.masks:
+                data[name] = pd.arrays.IntegerArray(values, self.masks[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def to_display_records(self, start=0, stop=None, include_total=True):
+        # The classic week-by-week table: values in units, '-' for missing entries and a closing 'Total' row.
+        # start/stop pick a page of weeks; the Total row always covers the whole run.
+        columns = {name: values[start:stop].tolist() for name, values in self.columns.items()}
+        masks = {name: mask[start:stop].tolist() for name, mask in self.masks.items()}
+        records = []
+        for i, week in enumerate(columns['week']):
+            demand_digit = None if masks['demand_digit'][i] else columns['demand_digit'][i]
+            lead_time_digit = None if masks['lead_time_digit'][i] else columns['lead_time_digit'][i]
+            lead_time = None if masks['lead_time'][i] else columns['lead_time'][i]
+            quantity_ordered = None if masks['quantity_ordered'][i] else columns['quantity_ordered'][i]
+            shortage = columns['shortage'][i]
+            shortage_cost = columns['shortage_cost'][i]
+            records.append({
+                'Week': week,
+                'Beginning Inventory': columns['beginning_inventory'][i] * 1000,
+                'Demand Digit': demand_digit if demand_digit else '-',
+                'Demand (K)': columns['demand'][i] * 1000,
+                'Ending Inventory': columns['ending_inventory'][i] * 1000,
+                'Shortage (k)': shortage if shortage else 0,
+                'Shortage Cost (Rs)': shortage_cost if shortage_cost else 0,
+                'Lead Time Digit': lead_time_digit if lead_time_digit else '-',
+                'Lead Time (weeks)': lead_time if lead_time else '-',
+                'Quantity Ordered': quantity_ordered * 1000 if quantity_ordered else '-'
+            })
+
+        if include_total:
+            total_row = dict.fromkeys(_DISPLAY_COLUMNS, '-')
+            total_row['Week'] = 'Total'
+            total_row['Shortage Cost (Rs)'] = self.totals['shortage_cost']
+            records.append(total_row)
+        return records
+
+    def to_display_frame(self, start=0, stop=None, include_total=True):
+        import pandas as pd
+
+        return pd.DataFrame(self.to_display_records(start, stop, include_total), columns=_DISPLAY_COLUMNS)
+
+    def summary(self):
+        stats = InventoryRunningStats()
+        stats.update_chunk({**self.columns, 'order_placed': ~self.masks['quantity_ordered']})
+        return {
+            **stats.summary(),
+            'stockout_weeks': int(np.count_nonzero(self.columns['shortage'])),
+            'total_shortage_cost': self.totals['shortage_cost'],
+            'total_ordering_cost': self.totals['ordering_cost'],
+            'total_cost': self.totals['total_cost'],
+        }
+
+    def inventory_profile(self, max_points=2000):
+        import pandas as pd
+
+        # Ending inventory (in units) binned to at most max_points rows, so long runs chart quickly
+        weeks = self.columns['week']
+        inventory = self.columns['ending_inventory'] * 1000
+        bin_size = max(1, -(-len(weeks) // max_points))
+        starts = np.arange(0, len(weeks), bin_size)
+        if not len(starts):
+            return pd.DataFrame(columns=['Week', 'Mean Inventory', 'Min Inventory', 'Max Inventory'])
+        counts = np.diff(np.append(starts, len(weeks)))
+        return pd.DataFrame({
+            'Week': weeks[starts],
+            'Mean Inventory': np.add.reduceat(inventory, starts) / counts,
+            'Min Inventory': np.minimum.reduceat(inventory, starts),
+            'Max Inventory': np.maximum.reduceat(inventory, starts),
+        })
+
+    def write(self, file, file_format='csv', chunk_size=65536):
+        # Writes chunk_size weeks at a time, so a long run is never held as one big frame or string.
+        # CSV (plain or gzipped) keeps the display layout; Parquet keeps the typed columns (thousands,
+        # nulls for missing entries) and stores the totals in the file metadata.
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {file_format!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        with _binary_output(file) as output:
+            if file_format == 'parquet':
+                self._write_parquet(output, chunk_size)
+            elif file_format == 'csv.gz':
+                with gzip.GzipFile(fileobj=output, mode='wb', compresslevel=6) as compressed:
+                    self._write_csv(compressed, chunk_size)
+            else:
+                self._write_csv(output, chunk_size)
+
+    def _display_text(self, start, stop):
+        # Vectorized twin of to_display_records for export: the same cells, already formatted as CSV lines
+        columns = {name: values[start:stop] for name, values in self.columns.items()}
+        masks = {name: mask[start:stop] for name, mask in self.masks.items()}
+
+        def text(values, missing=None):
+            # Formats each distinct value once; apart from the week, columns only hold a handful of them
+            distinct, codes = np.unique(values, return_inverse=True)
+            cells = np.array([str(value) for value in distinct.tolist()], dtype=object)[codes]
+            if missing is not None:
+                cells[missing | (values == 0)] = '-'
+            return cells.tolist()
+
+        fields = [
+            text(columns['week']),
+            text(columns['beginning_inventory'] * 1000),
+            text(columns['demand_digit'], masks['demand_digit']),
+            text(columns['demand'] * 1000),
+            text(columns['ending_inventory'] * 1000),
+            text(columns['shortage']),
+            text(columns['shortage_cost']),
+            text(columns['lead_time_digit'], masks['lead_time_digit']),
+            text(columns['lead_time'], masks['lead_time']),
+            text(columns['quantity_ordered'] * 1000, masks['quantity_ordered']),
+        ]
+        return ''.join([line + '\n' for line in map(','.join, zip(*fields))])
+
+    def _write_csv(self, output, chunk_size):
+        text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerow(_DISPLAY_COLUMNS)
+        for start in range(0, len(self), chunk_size):
+            text.write(self._display_text(start, start + chunk_size))
+        total_row = dict.fromkeys(_DISPLAY_COLUMNS, '-')
+        total_row['Week'] = 'Total'
+        total_row['Shortage Cost (Rs)'] = self.totals['shortage_cost']
+        writer.writerow(total_row.values())
+        text.flush()
+        text.detach()
+
+    def _write_parquet(self, output, chunk_size):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for start in range(0, max(len(self), 1), chunk_size):
+            stop = start + chunk_size
+            table = pa.table({
+                name: pa.array(values[start:stop], mask=self.masks[name][start:stop] if name in self.masks else None)
+                for name, values in self.columns.items()
+            })
+            if writer is None:
+                schema = table.schema.with_metadata({'totals': json.dumps(self.totals)})
+                writer = pq.ParquetWriter(output, schema)
+            writer.write_table(table.cast(schema))
+        writer.close()
+
+def _column_totals_of(columns, num_rows=None):
+    totals = {
+        'shortage_cost': columns['shortage_cost'][:num_rows].sum().item(),
+        'ordering_cost': columns['ordering_cost'][:num_rows].sum().item(),
+    }
+    totals['total_cost'] = totals['shortage_cost'] + totals['ordering_cost']
+    return totals
+
+def _collect_columns(records, num_rows, shortage_cost_per_thousand, order_cost_per_order, on_week=None, profiler=None):
+    # With a profiler, the whole run counts as 'simulation'; the loop's digit_lookup and order_processing
+    # timings are parts of it, not extra time
+    if profiler is not None:
+        with profiler.phase('simulation'):
+            result = _collect_columns(records, num_rows, shortage_cost_per_thousand, order_cost_per_order, on_week)
+        profiler.count('stockout_weeks', int(np.count_nonzero(result.columns['shortage'])))
+        return result
+    columns = {
+        name: np.zeros(num_rows, dtype=np.int64)
+        for name in ['week', 'beginning_inventory', 'demand_digit', 'demand', 'ending_inventory', 'shortage',
+                     'lead_time_digit', 'lead_time', 'quantity_ordered']
+    }
+    masks = {name: np.ones(num_rows, dtype=bool) for name in _MASKED_COLUMNS}
+    order_placed = np.zeros(num_rows, dtype=bool)
+
+    for i, record in enumerate(records):
+        columns['week'][i] = record.week
+        columns['beginning_inventory'][i] = record.beginning_inventory
+        columns['demand'][i] = record.demand
+        columns['ending_inventory'][i] = record.ending_inventory
+        columns['shortage'][i] = record.shortage
+        if record.demand_digit is not None:
+            columns['demand_digit'][i] = record.demand_digit
+            masks['demand_digit'][i] = False
+        if record.lead_time_digit is not None:
+            columns['lead_time_digit'][i] = record.lead_time_digit
+            columns['lead_time'][i] = record.lead_time
+            masks['lead_time_digit'][i] = False
+            masks['lead_time'][i] = False
+        if record.quantity_ordered:
+            columns['quantity_ordered'][i] = record.quantity_ordered
+            masks['quantity_ordered'][i] = False
+            order_placed[i] = True
+        if on_week is not None:
+            on_week(record)
+
+    columns['shortage_cost'] = columns['shortage'] * shortage_cost_per_thousand
+    columns['ordering_cost'] = order_placed * order_cost_per_order
+    return SimulationResult(columns, masks, _column_totals_of(columns))
+
+def simulate_inventory_columns(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    demand_random_digits,
+    lead_time_random_digits,
+    num_weeks,
+    allow_multiple_orders=False,
+    profiler=None
+):
+    records = iterate_inventory_system(
+        initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+        demand_distribution, lead_time_distribution, demand_random_digits, lead_time_random_digits, num_weeks,
+        allow_multiple_orders, profiler=profiler
+    )
+    return _collect_columns(records, num_weeks, shortage_cost_per_thousand, order_cost_per_order, profiler=profiler)
+
+def iterate_result_chunks(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    demand_random_digits,
+    lead_time_random_digits,
+    num_weeks,
+    allow_multiple_orders=False,
+    chunk_size=65536,
+    profiler=None
+):
+    # simulate_inventory_columns in pieces of chunk_size weeks, so a caller can report progress or stop
+    # between pieces; SimulationResult.concatenate(*pieces) is the full result.
+    records = iterate_inventory_system(
+        initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+        demand_distribution, lead_time_distribution, demand_random_digits, lead_time_random_digits, num_weeks,
+        allow_multiple_orders, profiler=profiler
+    )
+    for start in range(0, max(num_weeks, 1), chunk_size):
+        yield _collect_columns(
+            islice(records, chunk_size), min(chunk_size, num_weeks - start), shortage_cost_per_thousand,
+            order_cost_per_order, profiler=profiler
+        )
+    records.close()
+
+def simulate_inventory_system(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    demand_random_digits,
+    lead_time_random_digits,
+    num_weeks,
+    allow_multiple_orders=False,
+    profiler=None
+):
+    result = simulate_inventory_columns(
+        initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+        demand_distribution, lead_time_distribution, demand_random_digits, lead_time_random_digits, num_weeks,
+        allow_multiple_orders, profiler=profiler
+    )
+    if profiler is None:
+        return result.to_display_records()
+    with profiler.phase('display_records'):
+        return result.to_display_records()
+
+def _common_prefix_length(previous, current):
+    size = min(len(previous), len(current))
+    differs = np.asarray(previous[:size]) != np.asarray(current[:size])
+    return int(np.argmax(differs)) if differs.any() else size
+
+class IncrementalSimulator:
+    # Re-runs the week-by-week simulation from the latest checkpoint that new inputs leave untouched.
+    # Checkpoints are SimulationState snapshots taken every checkpoint_interval weeks; rows before the
+    # resume point are reused from the previous result, so editing the tail of the digit lists or
+    # extending num_weeks only costs the weeks that actually change.
+    def __init__(self, checkpoint_interval=256):
+        self.checkpoint_interval = checkpoint_interval
+        self.key = None
+        self.checkpoints = []
+        self.result = None
+        self.demand_random_digits = []
+        self.lead_time_random_digits = []
+        self.resumed_from_week = 0
+
+    def _resume_state(self, key, demand_random_digits, lead_time_random_digits, num_weeks):
+        if key != self.key or self.result is None:
+            return None
+        demand_prefix = _common_prefix_length(self.demand_random_digits, demand_random_digits)
+        lead_time_prefix = _common_prefix_length(self.lead_time_random_digits, lead_time_random_digits)
+        demand_unchanged = list(self.demand_random_digits) == list(demand_random_digits)
+        lead_times_unchanged = list(self.lead_time_random_digits) == list(lead_time_random_digits)
+        num_previous_lead_times = len(self.lead_time_random_digits)
+
+        for checkpoint in reversed(self.checkpoints):
+            if checkpoint.week > min(num_weeks, len(self.result)):
+                continue
+            demand_ok = demand_unchanged or checkpoint.week <= demand_prefix
+            # A checkpoint that had used every lead time digit may have skipped an order for want of one
+            lead_time_ok = lead_times_unchanged or checkpoint.lead_time_index < lead_time_prefix or (
+                checkpoint.lead_time_index == lead_time_prefix < num_previous_lead_times
+            )
+            if demand_ok and lead_time_ok:
+                return checkpoint
+        return None
+
+    def run(
+        self,
+        initial_inventory,
+        order_point,
+        max_inventory,
+        shortage_cost_per_thousand,
+        order_cost_per_order,
+        demand_distribution,
+        lead_time_distribution,
+        demand_random_digits,
+        lead_time_random_digits,
+        num_weeks,
+        allow_multiple_orders=False,
+        profiler=None
+    ):
+        demand_distribution = compile_distribution(demand_distribution)
+        lead_time_distribution = compile_distribution(lead_time_distribution)
+        demand_random_digits = list(demand_random_digits)
+        lead_time_random_digits = list(lead_time_random_digits)
+        key = (
+            initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+            allow_multiple_orders,
+            tuple(demand_distribution.values.tolist()), demand_distribution.resolution,
+            demand_distribution.segment_starts.tobytes(), demand_distribution.segment_indices.tobytes(),
+            tuple(lead_time_distribution.values.tolist()), lead_time_distribution.resolution,
+            lead_time_distribution.segment_starts.tobytes(), lead_time_distribution.segment_indices.tobytes(),
+        )
+
+        checkpoint = self._resume_state(key, demand_random_digits, lead_time_random_digits, num_weeks)
+        if checkpoint is None:
+            checkpoints = [SimulationState(initial_inventory, OrderPipeline(int(lead_time_distribution.values.max())))]
+            prefix = None
+        else:
+            checkpoints = [c for c in self.checkpoints if c.week <= checkpoint.week]
+            prefix = self.result.head(checkpoint.week)
+        state = checkpoints[-1].snapshot()
+        resumed_from_week = state.week
+
+        def save_checkpoint(record):
+            if record.week % self.checkpoint_interval == 0:
+                checkpoints.append(state.snapshot())
+
+        records = iterate_inventory_system(
+            initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+            demand_distribution, lead_time_distribution,
+            demand_random_digits[state.week:], lead_time_random_digits[state.lead_time_index:],
+            num_weeks, allow_multiple_orders, state=state, profiler=profiler
+        )
+        suffix = _collect_columns(
+            records, num_weeks - resumed_from_week, shortage_cost_per_thousand, order_cost_per_order,
+            on_week=save_checkpoint, profiler=profiler
+        )
+        if profiler is not None:
+            profiler.count('reused_weeks', resumed_from_week)
+        result = suffix if prefix is None else SimulationResult.concatenate(prefix, suffix)
+
+        self.key = key
+        self.checkpoints = checkpoints
+        self.result = result
+        self.demand_random_digits = demand_random_digits
+        self.lead_time_random_digits = lead_time_random_digits
+        self.resumed_from_week = resumed_from_week
+        return result
+
+def simulate_inventory_batch(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    demand_random_digits,
+    lead_time_random_digits,
+    num_weeks,
+    allow_multiple_orders=False,
+    profiler=None
+):
+    # Digits are (replications x weeks) and (replications x lead time draws) arrays; every replication
+    # follows the same rules as simulate_inventory_system, including running out of digits.
+    demand_random_digits = np.atleast_2d(np.asarray(demand_random_digits, dtype=np.int64))
+    lead_time_random_digits = np.atleast_2d(np.asarray(lead_time_random_digits, dtype=np.int64))
+    num_replications = max(demand_random_digits.shape[0], lead_time_random_digits.shape[0])
+    demand_random_digits = np.broadcast_to(demand_random_digits, (num_replications, demand_random_digits.shape[1]))
+    lead_time_random_digits = np.broadcast_to(lead_time_random_digits, (num_replications, lead_time_random_digits.shape[1]))
+
+    started = time.perf_counter()
+    lead_time_distribution = compile_distribution(lead_time_distribution)
+    demands = compile_distribution(demand_distribution).lookup(demand_random_digits)
+    lead_times = lead_time_distribution.lookup(lead_time_random_digits)
+    if profiler is not None:
+        profiler.add_time('digit_lookup', time.perf_counter() - started)
+        profiler.count('lookups', demands.size + lead_times.size)
+        started = time.perf_counter()
+    num_demand_digits = demands.shape[1]
+    num_lead_time_digits = lead_times.shape[1]
+
+    rows = np.arange(num_replications)
+    inventory = np.full(num_replications, initial_inventory, dtype=np.int64)
+    lead_time_index = np.zeros(num_replications, dtype=np.int64)
+
+    # Same ring-buffer pipeline as OrderPipeline, one row per replication
+    pipeline_size = int(lead_time_distribution.values.max()) + 1
+    pipeline_quantities = np.zeros((num_replications, pipeline_size), dtype=np.int64)
+    pipeline_order_counts = np.zeros((num_replications, pipeline_size), dtype=np.int64)
+    on_order = np.zeros(num_replications, dtype=np.int64)
+    num_orders = np.zeros(num_replications, dtype=np.int64)
+
+    # Quantities are kept in thousands, as in the model itself
+    demand = np.zeros((num_replications, num_weeks), dtype=np.int64)
+    ending_inventory = np.empty((num_replications, num_weeks), dtype=np.int64)
+    shortage = np.empty((num_replications, num_weeks), dtype=np.int64)
+    order_placed = np.zeros((num_replications, num_weeks), dtype=bool)
+    quantity_ordered = np.zeros((num_replications, num_weeks), dtype=np.int64)
+    lead_time = np.zeros((num_replications, num_weeks), dtype=np.int64)
+
+    for week in range(num_weeks):
+        slot = week % pipeline_size
+        inventory += pipeline_quantities[:, slot]
+        on_order -= pipeline_quantities[:, slot]
+        num_orders -= pipeline_order_counts[:, slot]
+        pipeline_quantities[:, slot] = 0
+        pipeline_order_counts[:, slot] = 0
+
+        if week < num_demand_digits:
+            demand[:, week] = demands[:, week]
+        week_demand = demand[:, week]
+        in_stock = inventory >= week_demand
+        shortage[:, week] = np.where(in_stock, 0, week_demand - inventory)
+        inventory = np.where(in_stock, inventory - week_demand, 0)
+        ending_inventory[:, week] = inventory
+
+        if allow_multiple_orders:
+            inventory_position = inventory + on_order
+            wants_order = inventory_position <= order_point
+        else:
+            inventory_position = inventory
+            wants_order = (inventory <= order_point) & (num_orders == 0)
+        wants_order &= lead_time_index < num_lead_time_digits
+        if num_lead_time_digits:
+            drawn_lead_time = lead_times[rows, np.minimum(lead_time_index, num_lead_time_digits - 1)]
+        else:
+            drawn_lead_time = np.zeros(num_replications, dtype=np.int64)
+        lead_time_index += wants_order
+        quantity = max_inventory - inventory_position
+        placed = wants_order & (quantity != 0)
+
+        placed_rows = rows[placed]
+        arrival_slots = (week + drawn_lead_time[placed] + 1) % pipeline_size
+        pipeline_quantities[placed_rows, arrival_slots] += quantity[placed]
+        pipeline_order_counts[placed_rows, arrival_slots] += 1
+        on_order += np.where(placed, quantity, 0)
+        num_orders += placed
+        order_placed[:, week] = placed
+        quantity_ordered[:, week] = np.where(placed, quantity, 0)
+        lead_time[:, week] = np.where(placed, drawn_lead_time, 0)
+
+    if profiler is not None:
+        profiler.add_time('weekly_steps', time.perf_counter() - started, num_weeks)
+        profiler.count('weeks', num_replications * num_weeks)
+        profiler.count('orders_placed', int(order_placed.sum()))
+        profiler.count('stockout_weeks', int(np.count_nonzero(shortage)))
+
+    shortage_cost = shortage * shortage_cost_per_thousand
+    ordering_cost = order_placed * order_cost_per_order
+    total_shortage_cost = shortage_cost.sum(axis=1)
+    total_ordering_cost = ordering_cost.sum(axis=1)
+
+    return {
+        'demand': demand,
+        'ending_inventory': ending_inventory,
+        'shortage': shortage,
+        'order_placed': order_placed,
+        'quantity_ordered': quantity_ordered,
+        'lead_time': lead_time,
+        'shortage_cost': shortage_cost,
+        'ordering_cost': ordering_cost,
+        'total_shortage_cost': total_shortage_cost,
+        'total_ordering_cost': total_ordering_cost,
+        'total_cost': total_shortage_cost + total_ordering_cost,
+    }
+
+def _generate_random_digits(seed, num_replications, num_weeks, demand_resolution=100, lead_time_resolution=100):
+    # At most one order is placed per week, so num_weeks lead time digits per replication are always enough
+    demand_source, lead_time_source = seeded_digit_sources(
+        seed, demand_resolution=demand_resolution, lead_time_resolution=lead_time_resolution
+    )
+    demand_random_digits = demand_source.replication_block(0, num_replications, num_weeks)
+    lead_time_random_digits = lead_time_source.replication_block(0, num_replications, num_weeks)
+    return demand_random_digits, lead_time_random_digits
+
+def _grid_random_digits(settings):
+    return _generate_random_digits(
+        settings['seed'], settings['num_replications'], settings['num_weeks'],
+        settings['demand_distribution'].resolution, settings['lead_time_distribution'].resolution
+    )
+
+# Digits for the grid run a pool worker belongs to; set once per worker by _init_grid_worker and freed
+# with the worker, so the parent process never holds them between runs
+_worker_random_digits = None
+
+def _init_grid_worker(settings):
+    global _worker_random_digits
+    _worker_random_digits = _grid_random_digits(settings)
+
+def _evaluate_policy_cells(cells, settings, random_digits=None):
+    # Every worker regenerates the same digits from the seed, so all cells see common random numbers
+    demand_random_digits, lead_time_random_digits = (
+        random_digits if random_digits is not None else _worker_random_digits
+    )
+    evaluated = []
+    for order_point, max_inventory in cells:
+        batch = simulate_inventory_batch(
+            initial_inventory=settings['initial_inventory'],
+            order_point=order_point,
+            max_inventory=max_inventory,
+            shortage_cost_per_thousand=settings['shortage_cost_per_thousand'],
+            order_cost_per_order=settings['order_cost_per_order'],
+            demand_distribution=settings['demand_distribution'],
+            lead_time_distribution=settings['lead_time_distribution'],
+            demand_random_digits=demand_random_digits,
+            lead_time_random_digits=lead_time_random_digits,
+            num_weeks=settings['num_weeks'],
+            allow_multiple_orders=settings['allow_multiple_orders']
+        )
+        total_cost = batch['total_cost']
+        std = total_cost.std(ddof=1) if len(total_cost) > 1 else 0.0
+        evaluated.append((order_point, max_inventory, total_cost.mean(), std))
+    return evaluated
+
+def optimize_policy_grid(
+    order_points,
+    max_inventories,
+    initial_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    num_weeks,
+    num_replications=1000,
+    seed=0,
+    confidence=0.95,
+    max_workers=None,
+    allow_multiple_orders=False
+):
+    settings = {
+        'initial_inventory': initial_inventory,
+        'shortage_cost_per_thousand': shortage_cost_per_thousand,
+        'order_cost_per_order': order_cost_per_order,
+        'demand_distribution': compile_distribution(demand_distribution),
+        'lead_time_distribution': compile_distribution(lead_time_distribution),
+        'num_weeks': num_weeks,
+        'num_replications': num_replications,
+        'seed': seed,
+        'allow_multiple_orders': allow_multiple_orders,
+    }
+    # One task per order point; cells where the order-up-to level does not exceed the order point are skipped
+    tasks = [
+        [(order_point, max_inventory) for max_inventory in max_inventories if max_inventory > order_point]
+        for order_point in order_points
+    ]
+    tasks = [cells for cells in tasks if cells]
+
+    evaluated = []
+    if max_workers == 1:
+        random_digits = _grid_random_digits(settings)
+        for cells in tasks:
+            evaluated.extend(_evaluate_policy_cells(cells, settings, random_digits))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_grid_worker, initargs=(settings,)
+        ) as executor:
+            for cell_results in executor.map(_evaluate_policy_cells, tasks, [settings] * len(tasks)):
+                evaluated.extend(cell_results)
+
+    import pandas as pd
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    grid = pd.DataFrame(evaluated, columns=['Order Point', 'Max Inventory', 'Mean Total Cost', 'Std Total Cost'])
+    half_width = z * grid['Std Total Cost'] / np.sqrt(num_replications)
+    grid['CI Lower'] = grid['Mean Total Cost'] - half_width
+    grid['CI Upper'] = grid['Mean Total Cost'] + half_width
+    grid['Best'] = False
+    if len(grid):
+        grid.loc[grid['Mean Total Cost'].idxmin(), 'Best'] = True
+    return grid
+
+# Largest stacked multi-item table (items x (resolution + 1) entries, 8 MB) built densely
+_STACKED_TABLE_MAX_ENTRIES = 10**6
+
+class _StackedValueTable:
+    # Maps (item row, random number) pairs to item values for a list of distributions sharing one
+    # resolution. Small ones stack their dense tables; otherwise item k's segment starts are offset by
+    # k * (resolution + 1), so one sorted array and one searchsorted serve every item.
+    def __init__(self, distributions):
+        distributions = [compile_distribution(distribution) for distribution in distributions]
+        self.resolution = resolution = distributions[0].resolution
+        for distribution in distributions:
+            if distribution.resolution != resolution:
+                raise ValueError("Every distribution must use the same digit resolution")
+            bounds = distribution.segment_bounds()
+            if ((distribution.segment_indices < 0) & (bounds[1:] > 1)).any():
+                raise ValueError(f"Every distribution must cover the random digits 1-{resolution}")
+        self.max_value = int(max(distribution.values.max() for distribution in distributions))
+
+        self.table = None
+        if len(distributions) * (resolution + 1) <= _STACKED_TABLE_MAX_ENTRIES:
+            self.table = np.stack([
+                distribution.values[np.maximum(distribution.category_indices(np.arange(resolution + 1)), 0)]
+                for distribution in distributions
+            ]).astype(np.int64)
+        else:
+            self.segment_starts = np.concatenate([
+                distribution.segment_starts + k * (resolution + 1) for k, distribution in enumerate(distributions)
+            ])
+            self.segment_values = np.concatenate([
+                distribution.values[np.maximum(distribution.segment_indices, 0)] for distribution in distributions
+            ]).astype(np.int64)
+
+    def __getitem__(self, rows_and_digits):
+        rows, random_digits = rows_and_digits
+        if self.table is not None:
+            return self.table[rows, random_digits]
+        positions = random_digits + rows * (self.resolution + 1)
+        return self.segment_values[np.searchsorted(self.segment_starts, positions, side='right') - 1]
+
+def _per_item(value, shape):
+    # Scalars apply everywhere, 1-D arrays are per SKU, 2-D arrays are per SKU and location
+    value = np.asarray(value)
+    if value.ndim == 1:
+        value = value[:, None]
+    return np.broadcast_to(value, shape)
+
+def simulate_multi_item(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distributions,
+    lead_time_distributions,
+    num_locations,
+    num_weeks,
+    seed=None,
+    allow_multiple_orders=False
+):
+    # Advances every (SKU, location) pair together, one NumPy step per week, with on-hand, pipeline and
+    # cost state held as SKU x location arrays. Each SKU has its own policy and distributions; digits
+    # come from seeded generators, so items never run out of them.
+    num_skus = len(demand_distributions)
+    shape = (num_skus, num_locations)
+    order_point = _per_item(order_point, shape)
+    max_inventory = _per_item(max_inventory, shape)
+    shortage_cost_per_thousand = _per_item(shortage_cost_per_thousand, shape)
+    order_cost_per_order = _per_item(order_cost_per_order, shape)
+
+    demand_table = _StackedValueTable(demand_distributions)
+    lead_time_table = _StackedValueTable(lead_time_distributions)
+    sku_rows = np.arange(num_skus)[:, None]
+    demand_source, lead_time_source = seeded_digit_sources(seed)
+    demand_rng = demand_source.generator()
+    lead_time_rng = lead_time_source.generator()
+
+    inventory = np.array(_per_item(initial_inventory, shape), dtype=np.int64)
+    pipeline_size = lead_time_table.max_value + 1
+    pipeline_quantities = np.zeros(shape + (pipeline_size,), dtype=np.int64)
+    pipeline_order_counts = np.zeros(shape + (pipeline_size,), dtype=np.int64)
+    on_order = np.zeros(shape, dtype=np.int64)
+    num_orders = np.zeros(shape, dtype=np.int64)
+
+    total_ending_inventory = np.zeros(shape, dtype=np.int64)
+    total_demand = np.zeros(shape, dtype=np.int64)
+    total_shortage = np.zeros(shape, dtype=np.int64)
+    orders_placed = np.zeros(shape, dtype=np.int64)
+
+    start_time = time.perf_counter()
+    for week in range(num_weeks):
+        slot = week % pipeline_size
+        inventory += pipeline_quantities[:, :, slot]
+        on_order -= pipeline_quantities[:, :, slot]
+        num_orders -= pipeline_order_counts[:, :, slot]
+        pipeline_quantities[:, :, slot] = 0
+        pipeline_order_counts[:, :, slot] = 0
+
+        demand = demand_table[sku_rows, demand_rng.integers(1, demand_table.resolution + 1, size=shape)]
+        in_stock = inventory >= demand
+        shortage = np.where(in_stock, 0, demand - inventory)
+        inventory = np.where(in_stock, inventory - demand, 0)
+
+        if allow_multiple_orders:
+            inventory_position = inventory + on_order
+            wants_order = inventory_position <= order_point
+        else:
+            inventory_position = inventory
+            wants_order = (inventory <= order_point) & (num_orders == 0)
+        quantity = max_inventory - inventory_position
+        placed = wants_order & (quantity != 0)
+
+        placed_skus, placed_locations = np.nonzero(placed)
+        lead_time_random_digits = lead_time_rng.integers(1, lead_time_table.resolution + 1, size=len(placed_skus))
+        lead_time = lead_time_table[placed_skus, lead_time_random_digits]
+        arrival_slots = (week + lead_time + 1) % pipeline_size
+        pipeline_quantities[placed_skus, placed_locations, arrival_slots] += quantity[placed]
+        pipeline_order_counts[placed_skus, placed_locations, arrival_slots] += 1
+        on_order += np.where(placed, quantity, 0)
+        num_orders += placed
+
+        total_ending_inventory += inventory
+        total_demand += demand
+        total_shortage += shortage
+        orders_placed += placed
+    elapsed = time.perf_counter() - start_time
+
+    total_shortage_cost = total_shortage * shortage_cost_per_thousand
+    total_ordering_cost = orders_placed * order_cost_per_order
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fill_rate = np.where(total_demand > 0, 1 - total_shortage / total_demand, 1.0)
+
+    return {
+        'mean_inventory': total_ending_inventory / max(num_weeks, 1),
+        'total_demand': total_demand,
+        'total_shortage': total_shortage,
+        'fill_rate': fill_rate,
+        'orders_placed': orders_placed,
+        'total_shortage_cost': total_shortage_cost,
+        'total_ordering_cost': total_ordering_cost,
+        'total_cost': total_shortage_cost + total_ordering_cost,
+        'elapsed_seconds': elapsed,
+        # Each (SKU, location) pair advanced by one week counts as one SKU-week
+        'sku_weeks_per_second': num_skus * num_locations * num_weeks / elapsed if elapsed > 0 else float('inf'),
+    }
+
+def _digit_probabilities(distribution):
+    # Probabilities as the engines actually sample them: the share of digits 1-resolution mapped to each value
+    distribution = compile_distribution(distribution)
+    bounds = np.maximum(distribution.segment_bounds(), 1)
+    covered = distribution.segment_indices >= 0
+    counts = np.bincount(
+        distribution.segment_indices[covered], np.diff(bounds)[covered], minlength=len(distribution.values)
+    ).astype(np.int64)
+    return [
+        (value, count / distribution.resolution)
+        for value, count in zip(distribution.values.tolist(), counts.tolist()) if count
+    ]
+
+def solve_steady_state(
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    initial_inventory=None,
+    max_dense_states=2000
+):
+    # Long-run weekly costs of the single-outstanding-order (s, S) policy, computed exactly from the
+    # Markov chain over end-of-week states (ending inventory, quantity on order, weeks until arrival).
+    # An order placed with lead time L arrives L + 1 weeks later, as in the simulation engines.
+    if not 0 <= order_point < max_inventory:
+        raise ValueError("The steady-state solver needs 0 <= order_point < max_inventory")
+    demand_probabilities = _digit_probabilities(demand_distribution)
+    lead_time_probabilities = _digit_probabilities(lead_time_distribution)
+    if initial_inventory is None:
+        initial_inventory = max_inventory
+
+    def order_outcomes(ending_inventory):
+        # (next state, probability, ordered) once demand has been met for the week
+        if ending_inventory <= order_point:
+            quantity = max_inventory - ending_inventory
+            return [((ending_inventory, quantity, lead_time + 1), prob, True) for lead_time, prob in lead_time_probabilities]
+        return [((ending_inventory, 0, 0), 1.0, False)]
+
+    # Enumerate the states reachable from the starting state, recording every transition sparsely
+    start = (initial_inventory, 0, 0)
+    state_index = {start: 0}
+    states = [start]
+    rows, cols, probs, shortages, orders = [], [], [], [], []
+    i = 0
+    while i < len(states):
+        inventory, quantity, weeks_to_arrival = states[i]
+        if weeks_to_arrival == 1:
+            inventory, quantity, weeks_to_arrival = inventory + quantity, 0, 0
+        for demand, demand_prob in demand_probabilities:
+            ending_inventory = max(inventory - demand, 0)
+            shortage = max(demand - inventory, 0)
+            if weeks_to_arrival:
+                outcomes = [((ending_inventory, quantity, weeks_to_arrival - 1), 1.0, False)]
+            else:
+                outcomes = order_outcomes(ending_inventory)
+            for next_state, prob, ordered in outcomes:
+                if next_state not in state_index:
+                    state_index[next_state] = len(states)
+                    states.append(next_state)
+                rows.append(i)
+                cols.append(state_index[next_state])
+                probs.append(demand_prob * prob)
+                shortages.append(shortage)
+                orders.append(ordered)
+        i += 1
+
+    num_states = len(states)
+    rows = np.array(rows)
+    cols = np.array(cols)
+    probs = np.array(probs)
+
+    if num_states <= max_dense_states:
+        # Direct solve of pi P = pi with sum(pi) = 1, one balance equation replaced by the normalisation
+        transition = np.zeros((num_states, num_states))
+        np.add.at(transition, (rows, cols), probs)
+        system = transition.T - np.eye(num_states)
+        system[-1] = 1.0
+        rhs = np.zeros(num_states)
+        rhs[-1] = 1.0
+        try:
+            stationary = np.linalg.solve(system, rhs)
+        except np.linalg.LinAlgError:
+            stationary = np.linalg.lstsq(system, rhs, rcond=None)[0]
+    else:
+        # Sparse power iteration on the lazy chain (P + I) / 2: same stationary law, no periodicity
+        stationary = np.full(num_states, 1 / num_states)
+        for _ in range(100_000):
+            updated = 0.5 * (stationary + np.bincount(cols, weights=stationary[rows] * probs, minlength=num_states))
+            if np.abs(updated - stationary).sum() < 1e-14:
+                stationary = updated
+                break
+            stationary = updated
+    stationary = np.clip(stationary, 0, None)
+    stationary /= stationary.sum()
+
+    flow = stationary[rows] * probs
+    ending_inventory = np.array([state[0] for state in states])
+    expected_shortage = float(flow @ np.array(shortages))
+    orders_per_week = float(flow @ np.array(orders, dtype=float))
+    expected_demand = sum(demand * prob for demand, prob in demand_probabilities)
+    shortage_cost = expected_shortage * shortage_cost_per_thousand
+    ordering_cost = orders_per_week * order_cost_per_order
+
+    return {
+        'shortage_cost_per_week': shortage_cost,
+        'ordering_cost_per_week': ordering_cost,
+        'total_cost_per_week': shortage_cost + ordering_cost,
+        'expected_shortage': expected_shortage,
+        'orders_per_week': orders_per_week,
+        'mean_inventory': float(stationary @ ending_inventory),
+        'fill_rate': 1 - expected_shortage / expected_demand if expected_demand else 1.0,
+        'num_states': num_states,
+        'states': states,
+        'stationary_distribution': stationary,
+    }
+
+VARIANCE_REDUCTION_METHODS = ['plain', 'antithetic', 'control_variate']
+
+def _run_replications(policy, demand_random_digits, lead_time_random_digits, num_weeks):
+    return simulate_inventory_batch(
+        demand_random_digits=demand_random_digits,
+        lead_time_random_digits=lead_time_random_digits,
+        num_weeks=num_weeks,
+        **policy
+    )
+
+def _interval(estimate, variance_of_estimate, confidence):
+    std_error = float(np.sqrt(max(variance_of_estimate, 0.0)))
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * std_error
+    return {
+        'estimate': float(estimate),
+        'std_error': std_error,
+        'ci_low': float(estimate - half_width),
+        'ci_high': float(estimate + half_width),
+    }
+
+def estimate_policy_cost(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    num_weeks,
+    num_replications=1000,
+    seed=0,
+    method='plain',
+    confidence=0.95,
+    allow_multiple_orders=False
+):
+    # Mean total cost over num_weeks with a variance-reduction method:
+    #   'antithetic'      - replications come in pairs driven by digits d and resolution + 1 - d
+    #   'control_variate' - total demand, whose expectation is known exactly, corrects each replication
+    # variance_reduction is the plain estimator's variance (same replication count) over this one's.
+    if method not in VARIANCE_REDUCTION_METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {VARIANCE_REDUCTION_METHODS}")
+    policy = {
+        'initial_inventory': initial_inventory,
+        'order_point': order_point,
+        'max_inventory': max_inventory,
+        'shortage_cost_per_thousand': shortage_cost_per_thousand,
+        'order_cost_per_order': order_cost_per_order,
+        'demand_distribution': compile_distribution(demand_distribution),
+        'lead_time_distribution': compile_distribution(lead_time_distribution),
+        'allow_multiple_orders': allow_multiple_orders,
+    }
+    resolutions = (policy['demand_distribution'].resolution, policy['lead_time_distribution'].resolution)
+
+    if method == 'antithetic':
+        num_pairs = max(num_replications // 2, 2)
+        demand_random_digits, lead_time_random_digits = _generate_random_digits(
+            seed, num_pairs, num_weeks, *resolutions
+        )
+        batch = _run_replications(
+            policy,
+            np.concatenate([demand_random_digits, resolutions[0] + 1 - demand_random_digits]),
+            np.concatenate([lead_time_random_digits, resolutions[1] + 1 - lead_time_random_digits]),
+            num_weeks
+        )
+        total_cost = batch['total_cost']
+        pair_means = (total_cost[:num_pairs] + total_cost[num_pairs:]) / 2
+        variance = pair_means.var(ddof=1) / num_pairs
+        plain_variance = total_cost.var(ddof=1) / len(total_cost)
+        result = _interval(pair_means.mean(), variance, confidence)
+    else:
+        num_replications = max(num_replications, 2)
+        demand_random_digits, lead_time_random_digits = _generate_random_digits(
+            seed, num_replications, num_weeks, *resolutions
+        )
+        batch = _run_replications(policy, demand_random_digits, lead_time_random_digits, num_weeks)
+        total_cost = batch['total_cost'].astype(float)
+        plain_variance = total_cost.var(ddof=1) / num_replications
+        if method == 'control_variate':
+            expected_demand = sum(value * prob for value, prob in _digit_probabilities(policy['demand_distribution']))
+            control = batch['demand'].sum(axis=1) - num_weeks * expected_demand
+            control_variance = control.var(ddof=1)
+            beta = np.cov(total_cost, control)[0, 1] / control_variance if control_variance > 0 else 0.0
+            adjusted = total_cost - beta * control
+            variance = adjusted.var(ddof=1) / num_replications
+            result = _interval(adjusted.mean(), variance, confidence)
+            result['beta'] = float(beta)
+        else:
+            variance = plain_variance
+            result = _interval(total_cost.mean(), variance, confidence)
+
+    result['method'] = method
+    result['num_replications'] = len(total_cost)
+    result['variance_reduction'] = float(plain_variance / variance) if variance > 0 else float('inf')
+    return result
+
+def compare_policies(
+    policies,
+    initial_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    num_weeks,
+    num_replications=1000,
+    seed=0,
+    confidence=0.95,
+    allow_multiple_orders=False
+):
+    # Evaluates every (order_point, max_inventory) pair on common random numbers and reports each
+    # policy's cost difference from the first one. variance_reduction compares the variance of that
+    # difference with what independent draws for the two policies would give.
+    demand_distribution = compile_distribution(demand_distribution)
+    lead_time_distribution = compile_distribution(lead_time_distribution)
+    num_replications = max(num_replications, 2)
+    demand_random_digits, lead_time_random_digits = _generate_random_digits(
+        seed, num_replications, num_weeks, demand_distribution.resolution, lead_time_distribution.resolution
+    )
+
+    costs = []
+    for order_point, max_inventory in policies:
+        batch = simulate_inventory_batch(
+            initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+            demand_distribution, lead_time_distribution, demand_random_digits, lead_time_random_digits, num_weeks,
+            allow_multiple_orders=allow_multiple_orders
+        )
+        costs.append(batch['total_cost'].astype(float))
+
+    reference = costs[0]
+    comparisons = []
+    for (order_point, max_inventory), cost in zip(policies, costs):
+        difference = cost - reference
+        crn_variance = difference.var(ddof=1) / num_replications
+        independent_variance = (cost.var(ddof=1) + reference.var(ddof=1)) / num_replications
+        comparison = {
+            'order_point': order_point,
+            'max_inventory': max_inventory,
+            **_interval(cost.mean(), cost.var(ddof=1) / num_replications, confidence),
+        }
+        difference_interval = _interval(difference.mean(), crn_variance, confidence)
+        comparison['difference'] = difference_interval['estimate']
+        comparison['difference_ci_low'] = difference_interval['ci_low']
+        comparison['difference_ci_high'] = difference_interval['ci_high']
+        comparison['variance_reduction'] = (
+            float(independent_variance / crn_variance) if crn_variance > 0 else float('inf')
+        )
+        comparisons.append(comparison)
+    return comparisons
+
+class RunningMoments:
+    # Welford-style running mean and variance; whole blocks are merged with Chan's pairwise update
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if not values.size:
+            return
+        block_count = values.size
+        block_mean = values.mean()
+        block_m2 = ((values - block_mean) ** 2).sum()
+        total = self.count + block_count
+        delta = block_mean - self.mean
+        self.mean += float(delta * block_count / total)
+        self._m2 += float(block_m2 + delta ** 2 * self.count * block_count / total)
+        self.count = total
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else float('inf')
+
+    def half_width(self, confidence=0.95):
+        if self.count < 2:
+            return float('inf')
+        return NormalDist().inv_cdf(0.5 + confidence / 2) * (self.variance / self.count) ** 0.5
+
+    def interval(self, confidence=0.95):
+        half_width = self.half_width(confidence)
+        return self.mean - half_width, self.mean + half_width
+
+def _block_digits(seed, block, block_size, num_weeks, demand_resolution=100, lead_time_resolution=100):
+    # Block b always gets the same digits, so adaptive runs are reproducible for a given block size
+    demand_source, lead_time_source = seeded_digit_sources(
+        seed, demand_resolution=demand_resolution, lead_time_resolution=lead_time_resolution
+    )
+    return (
+        demand_source.substream(block).draw((block_size, num_weeks)),
+        lead_time_source.substream(block).draw((block_size, num_weeks)),
+    )
+
+def run_adaptive(
+    initial_inventory,
+    order_point,
+    max_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    num_weeks,
+    target_half_width,
+    time_budget=None,
+    block_size=500,
+    max_replications=1_000_000,
+    seed=0,
+    confidence=0.95,
+    allow_multiple_orders=False,
+    on_block=None
+):
+    # Runs replications in blocks until the confidence interval of mean total cost is narrow enough,
+    # the time budget (seconds) is spent, or max_replications is reached. on_block(moments) is called
+    # after every block, e.g. to report progress; an exception raised there ends the run.
+    demand_distribution = compile_distribution(demand_distribution)
+    lead_time_distribution = compile_distribution(lead_time_distribution)
+    moments = RunningMoments()
+    start_time = time.perf_counter()
+    block = 0
+    while True:
+        demand_random_digits, lead_time_random_digits = _block_digits(
+            seed, block, block_size, num_weeks, demand_distribution.resolution, lead_time_distribution.resolution
+        )
+        batch = simulate_inventory_batch(
+            initial_inventory, order_point, max_inventory, shortage_cost_per_thousand, order_cost_per_order,
+            demand_distribution, lead_time_distribution, demand_random_digits, lead_time_random_digits, num_weeks,
+            allow_multiple_orders=allow_multiple_orders
+        )
+        moments.update(batch['total_cost'])
+        block += 1
+        if on_block is not None:
+            on_block(moments)
+
+        if moments.half_width(confidence) <= target_half_width:
+            stopped_by = 'precision'
+        elif time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            stopped_by = 'time_budget'
+        elif moments.count + block_size > max_replications:
+            stopped_by = 'max_replications'
+        else:
+            continue
+        break
+
+    ci_low, ci_high = moments.interval(confidence)
+    return {
+        'estimate': moments.mean,
+        'half_width': moments.half_width(confidence),
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+        'num_replications': moments.count,
+        'elapsed_seconds': time.perf_counter() - start_time,
+        'stopped_by': stopped_by,
+    }
+
+def rank_policies_adaptive(
+    policies,
+    initial_inventory,
+    shortage_cost_per_thousand,
+    order_cost_per_order,
+    demand_distribution,
+    lead_time_distribution,
+    num_weeks,
+    target_half_width,
+    time_budget=None,
+    block_size=500,
+    max_replications=1_000_000,
+    seed=0,
+    confidence=0.95,
+    allow_multiple_orders=False
+):
+    # Races (order_point, max_inventory) candidates on common random numbers, block by block. A candidate
+    # is dropped once its interval lies entirely above the current leader's, so replications go to the
+    # policies that are still close.
+    demand_distribution = compile_distribution(demand_distribution)
+    lead_time_distribution = compile_distribution(lead_time_distribution)
+    candidates = [
+        {'order_point': order_point, 'max_inventory': max_inventory, 'moments': RunningMoments(), 'status': 'active'}
+        for order_point, max_inventory in policies
+    ]
+    if not candidates:
+        raise ValueError("rank_policies_adaptive needs at least one policy")
+    start_time = time.perf_counter()
+    block = 0
+    stopped_by = 'max_replications'
+    while True:
+        active = [candidate for candidate in candidates if candidate['status'] == 'active']
+        demand_random_digits, lead_time_random_digits = _block_digits(
+            seed, block, block_size, num_weeks, demand_distribution.resolution, lead_time_distribution.resolution
+        )
+        for candidate in active:
+            batch = simulate_inventory_batch(
+                initial_inventory, candidate['order_point'], candidate['max_inventory'],
+                shortage_cost_per_thousand, order_cost_per_order, demand_distribution, lead_time_distribution,
+                demand_random_digits, lead_time_random_digits, num_weeks,
+                allow_multiple_orders=allow_multiple_orders
+            )
+            candidate['moments'].update(batch['total_cost'])
+        block += 1
+
+        leader = min(active, key=lambda candidate: candidate['moments'].mean)
+        leader_high = leader['moments'].interval(confidence)[1]
+        for candidate in active:
+            if candidate is not leader and candidate['moments'].interval(confidence)[0] > leader_high:
+                candidate['status'] = 'eliminated'
+                candidate['eliminated_after'] = candidate['moments'].count
+        active = [candidate for candidate in active if candidate['status'] == 'active']
+
+        if len(active) == 1:
+            stopped_by = 'single_survivor'
+        elif all(candidate['moments'].half_width(confidence) <= target_half_width for candidate in active):
+            stopped_by = 'precision'
+        elif time_budget is not None and time.perf_counter() - start_time >= time_budget:
+            stopped_by = 'time_budget'
+        elif leader['moments'].count + block_size > max_replications:
+            stopped_by = 'max_replications'
+        else:
+            continue
+        break
+
+    ranking = []
+    for candidate in candidates:
+        moments = candidate['moments']
+        ci_low, ci_high = moments.interval(confidence)
+        ranking.append({
+            'order_point': candidate['order_point'],
+            'max_inventory': candidate['max_inventory'],
+            'estimate': moments.mean,
+            'ci_low': ci_low,
+            'ci_high': ci_high,
+            'num_replications': moments.count,
+            'status': candidate['status'],
+            'eliminated_after': candidate.get('eliminated_after'),
+        })
+    ranking.sort(key=lambda entry: (entry['status'] != 'active', entry['estimate']))
+    return {'ranking': ranking, 'stopped_by': stopped_by, 'elapsed_seconds': time.perf_counter() - start_time}
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory_core import SimulationResult, iterate_result_chunks, run_adaptive
+
+class JobCancelled(Exception):
+    pass
+
+class SimulationJob:
+    # Handle to one background run: progress, partial results, cancellation and the underlying Future.
+    # Awaiting the job from asyncio code waits for its result without blocking the event loop.
+    # With abandon_after (seconds), a job nobody has polled for that long cancels itself at its next
+    # report, so runs whose page was closed don't hold a worker.
+    def __init__(self, total, profiler=None, abandon_after=None):
+        self.total = total
+        self.completed = 0
+        self.profiler = profiler
+        self.abandon_after = abandon_after
+        self.future = None
+        self.started_at = None
+        self.finished_at = None
+        self.last_polled = time.perf_counter()
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._partial = None
+
+    @property
+    def progress(self):
+        # Adaptive runs may finish early, well short of their replication cap
+        if self.future.done() and self.status == 'finished':
+            return 1.0
+        return min(self.completed / self.total, 1.0) if self.total else 1.0
+
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def status(self):
+        if self.future.cancelled():
+            return 'cancelled'
+        if not self.future.done():
+            return 'running' if self.future.running() else 'queued'
+        error = self.future.exception()
+        if error is None:
+            return 'finished'
+        return 'cancelled' if isinstance(error, JobCancelled) else 'failed'
+
+    def cancel(self):
+        # A queued job never starts; a running one stops at its next progress report
+        self._cancel_requested.set()
+        self.future.cancel()
+
+    def poll(self):
+        # Called by whoever is watching the job; see abandon_after
+        self.last_polled = time.perf_counter()
+
+    @property
+    def abandoned(self):
+        return self.abandon_after is not None and time.perf_counter() - self.last_polled > self.abandon_after
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def partial_result(self):
+        # What the worker has produced so far (None before the first report)
+        with self._lock:
+            build = self._partial
+        return build() if build is not None else None
+
+    def report(self, completed, partial=None):
+        # Called from the worker; partial is a zero-argument callable so partial results are only
+        # assembled when someone asks for them
+        with self._lock:
+            self.completed = completed
+            self._partial = partial
+        if self._cancel_requested.is_set():
+            raise JobCancelled(f"Cancelled after {completed} of {self.total}")
+        if self.abandoned:
+            raise JobCancelled(f"Abandoned after {completed} of {self.total}")
+
+    def _release_partial(self):
+        # A finished job's partial results would duplicate its full result
+        with self._lock:
+            self._partial = None
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+def _run_job(work, job):
+    job.started_at = time.perf_counter()
+    try:
+        if job.abandoned:
+            raise JobCancelled("Abandoned before it started")
+        result = work(job)
+        job._release_partial()
+        return result
+    finally:
+        job.finished_at = time.perf_counter()
+
+def _simulate_in_chunks(job, simulation_kwargs):
+    parts = []
+    for part in iterate_result_chunks(**simulation_kwargs, profiler=job.profiler):
+        parts.append(part)
+        job.report(job.completed + len(part), lambda parts=tuple(parts): SimulationResult.concatenate(*parts))
+    return SimulationResult.concatenate(*parts)
+
+def _estimate_adaptively(job, adaptive_kwargs):
+    confidence = adaptive_kwargs.get('confidence', 0.95)
+
+    def on_block(moments):
+        ci_low, ci_high = moments.interval(confidence)
+        estimate = {'estimate': moments.mean, 'ci_low': ci_low, 'ci_high': ci_high, 'num_replications': moments.count}
+        job.report(moments.count, lambda: estimate)
+
+    return run_adaptive(**adaptive_kwargs, on_block=on_block)
+
+class JobRunner:
+    # A bounded pool of worker threads meant to be shared (e.g. by every Streamlit session), so heavy runs
+    # queue up instead of each claiming a core. Threads keep progress and partial results in memory without
+    # pickling them between processes. abandon_after is passed on to every job.
+    def __init__(self, max_workers=2, abandon_after=None):
+        self.max_workers = max_workers
+        self.abandon_after = abandon_after
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inventory-job')
+
+    def submit(self, work, total, profiler=None):
+        # work(job) runs on a worker thread and should call job.report(...) as it goes
+        job = SimulationJob(total, profiler, self.abandon_after)
+        job.future = self.executor.submit(_run_job, work, job)
+        return job
+
+    def submit_simulation(self, chunk_size=10_000, profiler=None, **simulation_kwargs):
+        # Week-by-week run (simulate_inventory_columns arguments); progress and partial results every chunk
+        simulation_kwargs['chunk_size'] = chunk_size
+        return self.submit(
+            lambda job: _simulate_in_chunks(job, simulation_kwargs), simulation_kwargs['num_weeks'], profiler
+        )
+
+    def submit_adaptive(self, **adaptive_kwargs):
+        # Replication run (run_adaptive arguments); progress is counted against max_replications
+        total = adaptive_kwargs.get('max_replications', 1_000_000)
+        return self.submit(lambda job: _estimate_adaptively(job, adaptive_kwargs), total)
+
+    def shutdown(self, cancel_pending=True):
+        self.executor.shutdown(wait=True, cancel_futures=cancel_pending)
+
+class ResultStore:
+    # Finished results keyed by whatever produced them, shared by every caller and bounded by count and
+    # age, so results outlive their job without each session holding its own copy indefinitely.
+    def __init__(self, max_entries=4, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.perf_counter(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        # None when the result was never stored, has expired or was pushed out by newer ones
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if self.ttl_seconds is not None and time.perf_counter() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def __len__(self):
+        return len(self._entries)
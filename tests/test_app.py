@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Inventory_System_Simulation.py')
+
+def _run_simulation(num_weeks, seed=12345):
+    app = AppTest.from_file(APP, default_timeout=120).run()
+    app.radio[0].set_value('Seeded generator').run()
+    [field for field in app.number_input if field.label == 'Random Seed'][0].set_value(seed).run()
+    [field for field in app.number_input if field.label.startswith('Number of Weeks')][0].set_value(num_weeks).run()
+    [button for button in app.button if button.label == 'Run Simulation'][0].click().run()
+    return app
+
+def _total_cost(app):
+    return [metric.value for metric in app.metric if metric.label.startswith('Total Cost')][0]
+
+def test_shared_results_leave_other_sessions_simulators_alone():
+    first = _run_simulation(500, seed=101)
+    assert not first.exception
+    assert first.session_state['incremental_simulator'].result is not None
+
+    # Same arguments in a new session: served from the shared results without touching its simulator
+    second = _run_simulation(500, seed=101)
+    assert not second.exception
+    assert _total_cost(second) == _total_cost(first)
+    assert 'incremental_simulator' not in second.session_state or second.session_state['incremental_simulator'].result is None
+
+def _wait_for_job(app, timeout=120):
+    deadline = time.monotonic() + timeout
+    while 'simulation_job' in app.session_state and time.monotonic() < deadline:
+        time.sleep(0.5)
+        app.run()
+    assert 'simulation_job' not in app.session_state
+
+def test_long_run_export_is_prepared_on_request():
+    # Over EXPORT_CACHE_MAX_WEEKS the export is only built behind an explicit button
+    app = _run_simulation(120_000)
+    _wait_for_job(app)
+    assert not app.exception
+    assert not app.get('download_button')
+
+    [button for button in app.button if button.label == 'Prepare Export'][0].click().run()
+    assert not app.exception
+    assert [button.proto.label for button in app.get('download_button')] == ['Download Results']
+    export_key, export_data = app.session_state['prepared_export']
+    assert export_data.startswith(b'Week,Beginning Inventory,')
+    assert export_data.count(b'\n') == 120_000 + 2
+
+    # The prepared bytes stay until a new run starts
+    app.run()
+    assert app.get('download_button')
+    [button for button in app.button if button.label == 'Run Simulation'][0].click().run()
+    assert 'prepared_export' not in app.session_state
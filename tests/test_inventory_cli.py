@@ -0,0 +1,74 @@
+import csv
+import json
+
+import pytest
+
+from inventory_cli import SUMMARY_COLUMNS, load_scenarios, main, run_scenario
+
+TEXTBOOK_DIGITS = {
+    'demand_digits': [31, 70, 53, 86, 32, 78, 26, 64, 45, 12, 99, 52, 43, 84, 38, 40, 19, 87, 83, 73],
+    'lead_time_digits': [29, 83, 58, 41, 13],
+}
+
+def test_load_json_scenarios(tmp_path):
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps({'scenarios': [{'order_point': 1}, {'name': 'tight', 'max_inventory': 6}]}))
+    scenarios = load_scenarios(str(path))
+    assert scenarios == [{'order_point': 1, 'name': 'scenario_1'}, {'name': 'tight', 'max_inventory': 6}]
+
+def test_load_csv_scenarios(tmp_path):
+    path = tmp_path / 'scenarios.csv'
+    path.write_text(
+        "name,order_point,shortage_cost_per_thousand,demand_probabilities,demand_digits,allow_multiple_orders,seed\n"
+        "a,1,2.5,0.1;0.4;0.4;0.1,31 70 53,yes,\n"
+        ",,,,,,7\n"
+    )
+    first, second = load_scenarios(str(path))
+    assert first == {
+        'name': 'a', 'order_point': 1, 'shortage_cost_per_thousand': 2.5,
+        'demand_probabilities': [0.1, 0.4, 0.4, 0.1], 'demand_digits': [31, 70, 53], 'allow_multiple_orders': True,
+    }
+    # Empty cells fall back to the defaults
+    assert second == {'name': 'scenario_2', 'seed': 7}
+
+def test_unknown_fields_are_rejected(tmp_path):
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps([{'order_pont': 1}]))
+    with pytest.raises(ValueError, match='order_pont'):
+        load_scenarios(str(path))
+
+@pytest.mark.parametrize('resolution', [0, -100, 10 ** 10, 1.5, True, '1000'])
+def test_bad_digit_resolutions_are_rejected(tmp_path, resolution):
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps([{'digit_resolution': resolution}]))
+    with pytest.raises(ValueError, match='digit_resolution'):
+        load_scenarios(str(path))
+
+def test_finest_digit_resolution_runs(tmp_path):
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps([{'digit_resolution': 10 ** 9, 'num_weeks': 52, 'num_replications': 20, 'seed': 3}]))
+    [scenario] = load_scenarios(str(path))
+    summary = run_scenario(scenario)
+    assert summary['num_replications'] == 20
+
+def test_textbook_scenario():
+    summary = run_scenario({'name': 'textbook', **TEXTBOOK_DIGITS})
+    assert summary['mean_shortage_cost'] == 130
+    assert summary['mean_ordering_cost'] == 250
+    assert summary['orders_per_week'] == 0.25
+
+def test_missing_digit_list_falls_back_to_the_seed():
+    summary = run_scenario({'name': 'demand only', 'demand_digits': TEXTBOOK_DIGITS['demand_digits'], 'seed': 1})
+    assert summary['orders_per_week'] > 0
+    assert summary == run_scenario({'name': 'demand only', 'demand_digits': TEXTBOOK_DIGITS['demand_digits'], 'seed': 1})
+
+def test_main_writes_csv_summaries(tmp_path):
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'seed': 1, 'num_replications': 20}, {'seed': 2, 'order_point': 1}]))
+    output = tmp_path / 'summary.csv'
+    assert main([str(scenarios), '-o', str(output), '-j', '1']) == 0
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['name'] for row in rows] == ['scenario_1', 'scenario_2']
+    assert list(rows[0]) == SUMMARY_COLUMNS
+    assert float(rows[0]['std_total_cost']) > 0
@@ -0,0 +1,356 @@
+import gzip
+import io
+from itertools import islice
+import pickle
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_core import (
+    DENSE_TABLE_MAX_RESOLUTION,
+    DigitDistribution,
+    IncrementalSimulator,
+    InventoryRunningStats,
+    RandomDigitSource,
+    RunningMoments,
+    compare_policies,
+    determine_value_from_random_digit,
+    estimate_policy_cost,
+    iterate_inventory_chunks,
+    optimize_policy_grid,
+    rank_policies_adaptive,
+    run_adaptive,
+    seeded_digit_sources,
+    simulate_inventory_batch,
+    simulate_inventory_columns,
+    simulate_inventory_system,
+    simulate_multi_item,
+    solve_steady_state,
+    _StackedValueTable,
+)
+
+# The textbook example: (s, S) = (2, 4), 3,000 calendars on hand, and the hand-drawn random digits
+POLICY = (3, 2, 4, 10, 50)
+DEMAND = DigitDistribution.from_probabilities([0, 1, 2, 3], [0.2, 0.4, 0.3, 0.1])
+LEAD_TIME = DigitDistribution.from_probabilities([2, 3, 4], [0.3, 0.4, 0.3])
+DEMAND_DIGITS = [31, 70, 53, 86, 32, 78, 26, 64, 45, 12, 99, 52, 43, 84, 38, 40, 19, 87, 83, 73]
+LEAD_TIME_DIGITS = [29, 83, 58, 41, 13]
+
+def _random_digits(seed, num_replications, num_weeks, num_lead_times):
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, 101, (num_replications, num_weeks)), rng.integers(1, 101, (num_replications, num_lead_times))
+
+def test_textbook_table():
+    records = simulate_inventory_system(*POLICY, DEMAND, LEAD_TIME, DEMAND_DIGITS, LEAD_TIME_DIGITS, 20)
+    weeks, total = records[:-1], records[-1]
+
+    assert [r['Ending Inventory'] // 1000 for r in weeks] == [2, 0, 0, 0, 0, 0, 0, 0, 3, 3, 0, 0, 0, 0, 3, 2, 2, 0, 0, 0]
+    assert [r['Shortage (k)'] for r in weeks] == [0, 0, 1, 0, 1, 2, 1, 2, 0, 0, 0, 1, 1, 2, 0, 0, 0, 0, 2, 0]
+    orders = [(r['Week'], r['Lead Time (weeks)'], r['Quantity Ordered']) for r in weeks if r['Quantity Ordered'] != '-']
+    assert orders == [(1, 2, 2000), (4, 4, 4000), (11, 3, 4000), (16, 3, 2000), (20, 2, 4000)]
+    assert total['Week'] == 'Total'
+    assert total['Shortage Cost (Rs)'] == 130
+
+@pytest.mark.parametrize('allow_multiple_orders', [False, True])
+@pytest.mark.parametrize('num_lead_times', [3, 40])
+def test_batch_matches_scalar(allow_multiple_orders, num_lead_times):
+    # A handful of lead-time digits also covers running out of them part-way through
+    num_weeks = 40
+    demand_digits, lead_time_digits = _random_digits(1, 8, num_weeks, num_lead_times)
+    batch = simulate_inventory_batch(
+        *POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks, allow_multiple_orders
+    )
+    for replication in range(len(demand_digits)):
+        result = simulate_inventory_columns(
+            *POLICY, DEMAND, LEAD_TIME, demand_digits[replication], lead_time_digits[replication], num_weeks,
+            allow_multiple_orders
+        )
+        np.testing.assert_array_equal(batch['ending_inventory'][replication], result.columns['ending_inventory'])
+        np.testing.assert_array_equal(batch['shortage'][replication], result.columns['shortage'])
+        np.testing.assert_array_equal(batch['quantity_ordered'][replication], result.columns['quantity_ordered'])
+        assert batch['total_shortage_cost'][replication] == result.totals['shortage_cost']
+        assert batch['total_ordering_cost'][replication] == result.totals['ordering_cost']
+
+def test_table_lookup_matches_dict_scan():
+    # Gaps, overlaps (the earlier range wins) and digits outside every range, against the linear scan
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        num_values = int(rng.integers(1, 6))
+        starts = rng.integers(0, 101, num_values)
+        ends = starts + rng.integers(-5, 40, num_values)
+        distribution = {
+            value: {'start': int(start), 'end': int(min(end, 100))}
+            for value, start, end in zip(range(10, 10 + num_values), starts, ends)
+        }
+        compiled = DigitDistribution.from_dict(distribution)
+        for digit in range(-1, 102):
+            assert compiled.value_for(digit) == determine_value_from_random_digit(digit, distribution)
+
+def test_lookup_rejects_digits_outside_the_ranges():
+    distribution = DigitDistribution.from_dict({0: {'start': 1, 'end': 50}, 1: {'start': 60, 'end': 100}})
+    np.testing.assert_array_equal(distribution.lookup([1, 50, 60, 100]), [0, 0, 1, 1])
+    with pytest.raises(ValueError):
+        distribution.lookup([55])
+    with pytest.raises(ValueError):
+        distribution.lookup([101])
+
+def test_fine_resolutions_search_the_ranges():
+    # Above DENSE_TABLE_MAX_RESOLUTION there's no per-digit table, but gaps and overlaps resolve the same way
+    rng = np.random.default_rng(4)
+    resolution = DENSE_TABLE_MAX_RESOLUTION * 10
+    for _ in range(20):
+        num_values = int(rng.integers(1, 6))
+        starts = rng.integers(0, resolution + 1, num_values)
+        ends = starts + rng.integers(-500, resolution // 3, num_values)
+        distribution = {
+            value: {'start': int(start), 'end': int(min(end, resolution))}
+            for value, start, end in zip(range(10, 10 + num_values), starts, ends)
+        }
+        compiled = DigitDistribution.from_dict(distribution, resolution)
+        assert compiled.index_table is None
+        boundaries = [info[key] + offset for info in distribution.values() for key in ('start', 'end')
+                      for offset in (-1, 0, 1)]
+        digits = [d for d in boundaries + rng.integers(0, resolution + 1, 200).tolist() if 0 <= d <= resolution]
+        expected = [determine_value_from_random_digit(digit, distribution) for digit in digits]
+        assert [compiled.value_for(digit) for digit in digits] == expected
+        covered = [digit for digit, value in zip(digits, expected) if value is not None]
+        assert compiled.lookup(covered).tolist() == [value for value in expected if value is not None]
+
+@pytest.mark.parametrize('resolution', [10 ** 3, 10 ** 6, 10 ** 9])
+def test_fine_resolution_rounding_error(resolution):
+    probabilities = np.random.default_rng(5).dirichlet(np.ones(7))
+    distribution = DigitDistribution.from_probabilities(range(7), probabilities, resolution)
+    sampled = (distribution.ends - distribution.starts + 1) / resolution
+    assert np.abs(sampled - probabilities).max() <= 1 / resolution
+    assert distribution.lookup([1, resolution]).tolist() == [0, 6]
+    if resolution > DENSE_TABLE_MAX_RESOLUTION:
+        # Without a per-digit table, memory follows the number of outcomes, not the resolution
+        assert len(pickle.dumps(distribution)) < 10_000
+
+def test_from_dict_infers_the_resolution():
+    assert DigitDistribution.from_dict({0: {'start': 1, 'end': 60}, 1: {'start': 61, 'end': 90}}).resolution == 100
+    fine = DigitDistribution.from_probabilities([0, 1, 2], [0.25, 0.5, 0.25], 10 ** 6)
+    again = DigitDistribution.from_dict(fine.to_dict())
+    assert again.resolution == 10 ** 6
+    digits = np.random.default_rng(6).integers(1, 10 ** 6 + 1, 1000)
+    np.testing.assert_array_equal(again.lookup(digits), fine.lookup(digits))
+    # An explicit resolution wins over the top range end
+    assert DigitDistribution.from_dict(fine.to_dict(), 2 * 10 ** 6).resolution == 2 * 10 ** 6
+
+def test_grid_search_pool_matches_inline():
+    grid_args = ([1, 2, 3], [3, 4, 5], 3, 10, 50, DEMAND, LEAD_TIME, 52)
+    inline = optimize_policy_grid(*grid_args, num_replications=200, seed=7, max_workers=1)
+    pooled = optimize_policy_grid(*grid_args, num_replications=200, seed=7, max_workers=2)
+    pd.testing.assert_frame_equal(inline, pooled)
+    # (3, 3) has no room between the order point and the order-up-to level
+    assert len(inline) == 8
+    assert inline['Best'].sum() == 1
+
+def test_seeded_substreams_are_reproducible():
+    demand_source, lead_time_source = seeded_digit_sources(11)
+    again, _ = seeded_digit_sources(11)
+    assert list(islice(demand_source, 5000)) == list(islice(again, 5000))
+    # Iterating again replays the stream; demand and lead-time streams are independent of each other
+    assert list(islice(demand_source, 100)) == list(islice(demand_source, 100))
+    assert list(islice(demand_source, 100)) != list(islice(lead_time_source, 100))
+    assert list(islice(demand_source, 100)) != list(islice(seeded_digit_sources(12)[0], 100))
+
+    # Replication r gets substream r however the replications are split up
+    block = demand_source.replication_block(0, 6, 50)
+    np.testing.assert_array_equal(block[2:], demand_source.replication_block(2, 4, 50))
+    np.testing.assert_array_equal(block[3], demand_source.substream(3).draw(50))
+    assert len({row.tobytes() for row in block}) == 6
+
+def test_seeded_digits_cover_the_resolution():
+    digits = seeded_digit_sources(0, demand_resolution=10 ** 6)[0].draw(100_000)
+    assert digits.min() >= 1 and digits.max() <= 10 ** 6
+    digits = RandomDigitSource(0).draw(100_000)
+    assert set(np.unique(digits).tolist()) == set(range(1, 101))
+
+def test_multi_item_single_pair_matches_scalar():
+    # One SKU at one location draws one demand digit a week and one lead-time digit per order, so replaying
+    # its generators gives the digits for the scalar engine
+    num_weeks = 300
+    multi = simulate_multi_item(3, 2, 4, 10, 50, [DEMAND], [LEAD_TIME], 1, num_weeks, seed=5)
+    demand_source, lead_time_source = seeded_digit_sources(5)
+    demand_rng, lead_time_rng = demand_source.generator(), lead_time_source.generator()
+    demand_digits = [int(demand_rng.integers(1, 101, size=(1, 1))[0, 0]) for _ in range(num_weeks)]
+    lead_time_digits = [int(lead_time_rng.integers(1, 101, size=1)[0]) for _ in range(num_weeks)]
+    result = simulate_inventory_columns(*POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks)
+
+    assert multi['total_shortage'][0, 0] == result.columns['shortage'].sum()
+    assert multi['orders_placed'][0, 0] == np.count_nonzero(result.columns['quantity_ordered'])
+    assert multi['total_cost'][0, 0] == result.totals['total_cost']
+    assert multi['mean_inventory'][0, 0] == result.columns['ending_inventory'].mean()
+
+def test_multi_item_per_sku_policies():
+    wide_demand = DigitDistribution.from_probabilities([0, 5], [0.5, 0.5])
+    multi = simulate_multi_item(
+        3, [2, 0], [4, 1], 10, 50, [DEMAND, wide_demand], [LEAD_TIME, LEAD_TIME], 3, 100, seed=1
+    )
+    assert multi['total_cost'].shape == (2, 3)
+    # Locations draw their own demand, and the second SKU is badly under-stocked
+    assert len(set(multi['total_demand'][0].tolist())) > 1
+    assert (multi['fill_rate'][1] < multi['fill_rate'][0]).all()
+
+    # Tables too big to stack densely search every SKU's ranges at once
+    rng = np.random.default_rng(7)
+    fine = [
+        DigitDistribution.from_probabilities(range(4), rng.dirichlet(np.ones(4)), 10 ** 6) for _ in range(20)
+    ]
+    table = _StackedValueTable(fine)
+    assert table.table is None
+    rows = np.repeat(np.arange(20)[:, None], 50, axis=1)
+    digits = rng.integers(1, 10 ** 6 + 1, size=rows.shape)
+    expected = np.stack([distribution.lookup(row) for distribution, row in zip(fine, digits)])
+    np.testing.assert_array_equal(table[rows, digits], expected)
+    assert simulate_multi_item(3, 2, 4, 10, 50, fine, [LEAD_TIME] * 20, 2, 10, seed=1)['total_cost'].shape == (20, 2)
+
+    # Every SKU must draw from the same digit range
+    fine_demand = DigitDistribution.from_probabilities([0, 5], [0.5, 0.5], 10 ** 4)
+    with pytest.raises(ValueError):
+        simulate_multi_item(3, 2, 4, 10, 50, [DEMAND, fine_demand], [LEAD_TIME, LEAD_TIME], 1, 10, seed=1)
+
+def test_steady_state_matches_long_run_simulation():
+    exact = solve_steady_state(2, 4, 10, 50, DEMAND, LEAD_TIME)
+    demand_source, lead_time_source = seeded_digit_sources(0)
+    stats = InventoryRunningStats()
+    for chunk in iterate_inventory_chunks(*POLICY, DEMAND, LEAD_TIME, demand_source, lead_time_source, 1_000_000):
+        stats.update_chunk(chunk)
+    assert stats.cost_per_week == pytest.approx(exact['total_cost_per_week'], abs=0.05)
+    assert stats.orders_placed / stats.weeks == pytest.approx(exact['orders_per_week'], abs=0.001)
+    assert stats.fill_rate == pytest.approx(exact['fill_rate'], abs=0.002)
+
+@pytest.mark.parametrize('order_point, max_inventory', [(2, 4), (0, 7), (3, 5)])
+def test_steady_state_power_iteration_matches_dense_solve(order_point, max_inventory):
+    dense = solve_steady_state(order_point, max_inventory, 10, 50, DEMAND, LEAD_TIME)
+    iterated = solve_steady_state(order_point, max_inventory, 10, 50, DEMAND, LEAD_TIME, max_dense_states=0)
+    assert iterated['total_cost_per_week'] == pytest.approx(dense['total_cost_per_week'], rel=1e-9)
+    assert iterated['mean_inventory'] == pytest.approx(dense['mean_inventory'], rel=1e-9)
+
+@pytest.mark.parametrize('order_point, max_inventory', [(4, 4), (5, 4), (-1, 4)])
+def test_steady_state_rejects_invalid_policies(order_point, max_inventory):
+    with pytest.raises(ValueError):
+        solve_steady_state(order_point, max_inventory, 10, 50, DEMAND, LEAD_TIME)
+
+@pytest.mark.parametrize('method', ['antithetic', 'control_variate'])
+def test_variance_reduction_agrees_with_plain_estimate(method):
+    plain = estimate_policy_cost(*POLICY, DEMAND, LEAD_TIME, 52, 2000, seed=0)
+    reduced = estimate_policy_cost(*POLICY, DEMAND, LEAD_TIME, 52, 2000, seed=0, method=method)
+    assert reduced['ci_low'] <= plain['estimate'] <= reduced['ci_high']
+    assert plain['ci_low'] <= reduced['estimate'] <= plain['ci_high']
+    assert reduced['variance_reduction'] > 1
+    assert reduced['ci_high'] - reduced['ci_low'] < plain['ci_high'] - plain['ci_low']
+
+def test_unknown_variance_reduction_method():
+    with pytest.raises(ValueError):
+        estimate_policy_cost(*POLICY, DEMAND, LEAD_TIME, 52, 100, method='stratified')
+
+def test_common_random_numbers_narrow_the_difference():
+    reference, *others = compare_policies([(2, 4), (1, 5), (3, 6)], 3, 10, 50, DEMAND, LEAD_TIME, 52, 2000, seed=0)
+    assert reference['difference'] == 0
+    z = NormalDist().inv_cdf(0.975)
+    for comparison in others:
+        independent_half_width = z * np.hypot(comparison['std_error'], reference['std_error'])
+        crn_half_width = (comparison['difference_ci_high'] - comparison['difference_ci_low']) / 2
+        assert crn_half_width < independent_half_width
+        assert comparison['variance_reduction'] > 1
+        assert comparison['difference'] == pytest.approx(comparison['estimate'] - reference['estimate'])
+
+def test_running_moments_merge_blocks():
+    rng = np.random.default_rng(4)
+    blocks = [rng.normal(100, 15, size) for size in (1, 0, 7, 500, 2, 1000)]
+    moments = RunningMoments()
+    for block in blocks:
+        moments.update(block)
+    values = np.concatenate(blocks)
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert moments.variance == pytest.approx(np.var(values, ddof=1), rel=1e-10)
+    assert RunningMoments().half_width() == float('inf')
+
+@pytest.mark.parametrize('target_half_width, time_budget, max_replications, stopped_by', [
+    (1000.0, None, 10_000, 'precision'),
+    (0.0, 0.0, 10_000, 'time_budget'),
+    (0.0, None, 1000, 'max_replications'),
+])
+def test_run_adaptive_stopping_rules(target_half_width, time_budget, max_replications, stopped_by):
+    result = run_adaptive(
+        *POLICY, DEMAND, LEAD_TIME, 52, target_half_width, time_budget=time_budget, block_size=200,
+        max_replications=max_replications, seed=3
+    )
+    assert result['stopped_by'] == stopped_by
+    assert result['ci_low'] <= result['estimate'] <= result['ci_high']
+    assert result['num_replications'] <= max_replications
+    if stopped_by != 'max_replications':
+        assert result['num_replications'] == 200
+
+def test_run_adaptive_reaches_the_target_precision():
+    result = run_adaptive(*POLICY, DEMAND, LEAD_TIME, 52, 3.0, block_size=200, seed=3)
+    assert result['stopped_by'] == 'precision'
+    assert result['half_width'] <= 3.0
+    assert result['num_replications'] > 200
+
+def test_rank_policies_eliminates_a_clearly_worse_policy():
+    # Ordering one unit at a time (0, 1) runs short almost every week
+    result = rank_policies_adaptive([(0, 1), (1, 5)], 3, 10, 50, DEMAND, LEAD_TIME, 52, 0.0, block_size=200, seed=3)
+    assert result['stopped_by'] == 'single_survivor'
+    best, worst = result['ranking']
+    assert (best['order_point'], best['max_inventory'], best['status']) == (1, 5, 'active')
+    assert (worst['order_point'], worst['max_inventory'], worst['status']) == (0, 1, 'eliminated')
+    assert worst['eliminated_after'] == 200
+
+@pytest.mark.parametrize('target_half_width, time_budget, max_replications, stopped_by', [
+    (1000.0, None, 10_000, 'precision'),
+    (0.0, 0.0, 10_000, 'time_budget'),
+    (0.0, None, 600, 'max_replications'),
+])
+def test_rank_policies_stopping_rules(target_half_width, time_budget, max_replications, stopped_by):
+    # Two policies about 0.5 apart in mean cost, too close to separate in a few blocks
+    result = rank_policies_adaptive(
+        [(2, 6), (3, 7)], 3, 10, 50, DEMAND, LEAD_TIME, 52, target_half_width, time_budget=time_budget,
+        block_size=200, max_replications=max_replications, seed=3
+    )
+    assert result['stopped_by'] == stopped_by
+    assert [entry['status'] for entry in result['ranking']] == ['active', 'active']
+
+def test_rank_policies_needs_a_policy():
+    with pytest.raises(ValueError):
+        rank_policies_adaptive([], 3, 10, 50, DEMAND, LEAD_TIME, 52, 1.0)
+
+def test_incremental_matches_full_run():
+    num_weeks = 1000
+    demand_digits, lead_time_digits = _random_digits(2, 1, num_weeks, num_weeks)
+    demand_digits, lead_time_digits = demand_digits[0].tolist(), lead_time_digits[0].tolist()
+    simulator = IncrementalSimulator(checkpoint_interval=64)
+    simulator.run(*POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks)
+
+    # Editing a late digit replays only the weeks after the last checkpoint before it
+    demand_digits[700] = 100 if demand_digits[700] != 100 else 1
+    result = simulator.run(*POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks)
+    assert 0 < simulator.resumed_from_week <= 700
+    full = simulate_inventory_columns(*POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks)
+    assert result.to_display_records() == full.to_display_records()
+    assert result.totals == full.totals
+
+    # A longer horizon resumes near the old end; a policy change starts over
+    result = simulator.run(*POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits + [50] * 200, num_weeks + 200)
+    assert simulator.resumed_from_week > 700
+    full = simulate_inventory_columns(
+        *POLICY, DEMAND, LEAD_TIME, demand_digits, lead_time_digits + [50] * 200, num_weeks + 200
+    )
+    assert result.to_display_records() == full.to_display_records()
+    simulator.run(3, 1, 4, 10, 50, DEMAND, LEAD_TIME, demand_digits, lead_time_digits, num_weeks)
+    assert simulator.resumed_from_week == 0
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_csv_export_matches_to_csv(chunk_size):
+    result = simulate_inventory_columns(*POLICY, DEMAND, LEAD_TIME, DEMAND_DIGITS, LEAD_TIME_DIGITS, 20)
+    buffer = io.BytesIO()
+    result.write(buffer, 'csv', chunk_size)
+    assert buffer.getvalue() == result.to_display_frame().to_csv(index=False).encode()
+    compressed = io.BytesIO()
+    result.write(compressed, 'csv.gz', chunk_size)
+    assert gzip.decompress(compressed.getvalue()) == buffer.getvalue()
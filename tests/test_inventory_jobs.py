@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from inventory_core import DigitDistribution, RandomDigitSource, simulate_inventory_columns
+from inventory_jobs import JobCancelled, JobRunner, ResultStore
+
+DEMAND = DigitDistribution.from_probabilities([0, 1, 2, 3], [0.2, 0.4, 0.3, 0.1])
+LEAD_TIME = DigitDistribution.from_probabilities([2, 3, 4], [0.3, 0.4, 0.3])
+
+def _simulation_kwargs(num_weeks):
+    return {
+        'initial_inventory': 3, 'order_point': 2, 'max_inventory': 4, 'shortage_cost_per_thousand': 10,
+        'order_cost_per_order': 50, 'demand_distribution': DEMAND, 'lead_time_distribution': LEAD_TIME,
+        'demand_random_digits': RandomDigitSource(1), 'lead_time_random_digits': RandomDigitSource(2),
+        'num_weeks': num_weeks,
+    }
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=1)
+    yield runner
+    runner.shutdown()
+
+def _stepped_work(steps, release):
+    # Reports one step each time release is set, so a test can look at the job between reports
+    def work(job):
+        for step in range(1, steps + 1):
+            release.wait(5)
+            release.clear()
+            job.report(step, lambda step=step: f"{step} steps")
+        return 'done'
+    return work
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+def test_simulation_job_matches_direct_run(runner):
+    job = runner.submit_simulation(chunk_size=3000, **_simulation_kwargs(10_000))
+    result = job.result(timeout=30)
+    expected = simulate_inventory_columns(**_simulation_kwargs(10_000))
+    assert result.to_display_records() == expected.to_display_records()
+    assert (job.status, job.progress, job.completed) == ('finished', 1.0, 10_000)
+    # Partial results would only duplicate the finished result
+    assert job.partial_result() is None
+
+def test_progress_and_partial_results(runner):
+    release = threading.Event()
+    job = runner.submit(_stepped_work(4, release), total=4)
+    assert job.partial_result() is None
+    release.set()
+    _wait_for(lambda: job.completed == 1)
+    assert job.status == 'running'
+    assert job.progress == 0.25
+    assert job.partial_result() == '1 steps'
+    for _ in range(3):
+        release.set()
+        time.sleep(0.05)
+    assert job.result(timeout=5) == 'done'
+    assert job.progress == 1.0
+
+def test_cancel_running_and_queued_jobs(runner):
+    release = threading.Event()
+    running = runner.submit(_stepped_work(10, release), total=10)
+    queued = runner.submit(_stepped_work(10, threading.Event()), total=10)
+    release.set()
+    _wait_for(lambda: running.completed == 1)
+    assert queued.status == 'queued'
+
+    queued.cancel()
+    running.cancel()
+    release.set()
+    with pytest.raises(JobCancelled):
+        running.result(timeout=5)
+    assert running.status == 'cancelled'
+    assert running.partial_result() is not None
+    assert queued.status == 'cancelled'
+    assert queued.started_at is None
+
+def test_unpolled_jobs_are_abandoned():
+    runner = JobRunner(max_workers=1, abandon_after=0.2)
+    try:
+        def work(job):
+            for step in range(1, 1000):
+                time.sleep(0.01)
+                job.report(step)
+            return 'done'
+
+        abandoned = runner.submit(work, total=1000)
+        with pytest.raises(JobCancelled, match='Abandoned'):
+            abandoned.result(timeout=10)
+        assert abandoned.completed < 1000
+
+        watched = runner.submit(work, total=1000)
+        while not watched.done():
+            watched.poll()
+            time.sleep(0.05)
+        assert watched.result() == 'done'
+    finally:
+        runner.shutdown()
+
+def test_adaptive_job_can_be_awaited(runner):
+    job = runner.submit_adaptive(
+        initial_inventory=3, order_point=2, max_inventory=4, shortage_cost_per_thousand=10, order_cost_per_order=50,
+        demand_distribution=DEMAND, lead_time_distribution=LEAD_TIME, num_weeks=52, target_half_width=10.0,
+        block_size=200, seed=1
+    )
+
+    async def wait():
+        return await job
+
+    result = asyncio.run(wait())
+    assert result['stopped_by'] == 'precision'
+    assert job.partial_result() is None
+    assert job.progress == 1.0
+
+def test_result_store_is_bounded():
+    store = ResultStore(max_entries=2, ttl_seconds=0.2)
+    store.put('a', 1)
+    store.put('b', 2)
+    assert store.get('a') == 1
+    store.put('c', 3)
+    # 'b' was the least recently used
+    assert (store.get('a'), store.get('b'), store.get('c')) == (1, None, 3)
+    time.sleep(0.25)
+    assert store.get('a') is None
+    assert len(store) == 1